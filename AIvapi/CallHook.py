@@ -1,4 +1,3 @@
-import json
 from datetime import datetime, timezone
 from typing import Any, Dict, Union
 import re
@@ -6,7 +5,8 @@ import openai
 from django.conf import settings
 from openai import OpenAI
 import pytz
-from restaurants.models import Restaurant
+from restaurants.models import Restaurant, OpenAndCloseTime
+from .archive import archive_payload
 
 openai.api_key = settings.OPENAI_API_KEY
 client = OpenAI(api_key=openai.api_key)
@@ -151,8 +151,33 @@ def get_time():
 
 
 
-def vapi_webhook(request):
-    payload = request.data
+def callback_required(restaurant, call_type, call_datetime):
+    """
+    Orders placed outside the opening hours (or on a closed day) don't need a callback.
+    """
+    if call_type != "order" or call_datetime is None:
+        return True
+
+    if isinstance(call_datetime, str):
+        call_datetime = datetime.fromisoformat(call_datetime)
+
+    call_datetime_local = call_datetime.astimezone(pytz.timezone('Europe/Berlin'))
+    call_time = call_datetime_local.time()
+    day_of_week = call_datetime_local.strftime('%A').lower()
+
+    day_schedule = OpenAndCloseTime.objects.filter(restaurant=restaurant, day_of_week=day_of_week).first()
+    if day_schedule:
+        if day_schedule.is_closed:
+            return False
+        if day_schedule.opening_time and day_schedule.closing_time:
+            if not (day_schedule.opening_time <= call_time <= day_schedule.closing_time):
+                return False
+    return True
+
+
+
+
+def vapi_webhook(payload):
     message = payload.get("message", {}) if isinstance(payload, dict) else {}
     artifact = message.get("artifact", {}) if isinstance(message, dict) else {}
     message_type = message.get("type")
@@ -161,11 +186,7 @@ def vapi_webhook(request):
         return {"status": "ignored", "reason": message_type}
     
 
-    try:
-        with open('text.txt', 'w') as f:
-            json.dump(payload, f, indent=4)
-    except Exception as e:
-        print(f"Error saving payload to file: {e}")
+    archive_payload(payload)
 
     call_date = get_call_date(message)
 
@@ -191,14 +212,15 @@ def vapi_webhook(request):
 
     assistant_id = message.get("assistant", {}).get("id")
     parsed = {
-        "type": define_type(summary),
+        "type": None,  # filled in by AIvapi.tasks.classify_call_information
         "call_date": call_date,
         "phone" : message.get("customer" ,{}).get("number"),
         "duration_seconds": duration_seconds,
         "summary": summary,
         "recording": recording_mono_combined_url,
         "assistant_id": assistant_id,
-        "cost": message.get("cost")
+        "cost": message.get("cost"),
+        "call_id": (message.get("call") or {}).get("id"),
     }
     return parsed
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Assistance,CallInformations
+from .models import Assistance,CallInformations,CallUsage
 
 # Register your models here.
 
@@ -42,4 +42,18 @@ class CallInformationsAdmin(admin.ModelAdmin):
         "customer_name",
     )
     search_fields = ("phone", "customer_name", "assistant_id")
-    list_filter = ("type", "call_date_utc")
\ No newline at end of file
+    list_filter = ("type", "call_date_utc")
+
+
+
+
+@admin.register(CallUsage)
+class CallUsageAdmin(admin.ModelAdmin):
+    list_display = (
+        "restaurant",
+        "period_start",
+        "total_seconds",
+        "total_cost",
+        "call_count",
+    )
+    list_filter = ("period_start",)
@@ -0,0 +1,108 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+_logger = logging.getLogger("AIvapi.webhook_archive")
+_listener = None
+_listener_lock = threading.Lock()
+
+
+
+
+def _gzip_namer(name):
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source, dest):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _start_listener():
+    """
+    Attach a queue handler to the archive logger and start the background
+    thread that writes the queued lines to the rotating file.
+    """
+    global _listener
+
+    path = settings.VAPI_ARCHIVE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    file_handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.VAPI_ARCHIVE_MAX_BYTES,
+        backupCount=settings.VAPI_ARCHIVE_BACKUP_COUNT,
+        encoding="utf-8",
+        delay=True,
+    )
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    if settings.VAPI_ARCHIVE_COMPRESS:
+        file_handler.namer = _gzip_namer
+        file_handler.rotator = _gzip_rotator
+
+    archive_queue = queue.Queue(-1)
+    _logger.addHandler(QueueHandler(archive_queue))
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+    _listener = QueueListener(archive_queue, file_handler)
+    _listener.start()
+    atexit.register(stop_archive)
+
+
+
+
+def stop_archive():
+    """Flush the queued lines and stop the writer thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+
+
+def archive_payload(payload):
+    """
+    Queue a webhook payload as one compact JSON line. The file write happens on
+    the listener thread, so the request only pays for the json.dumps.
+    """
+    sample_rate = settings.VAPI_ARCHIVE_SAMPLE_RATE
+    if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+        return
+
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _start_listener()
+
+    try:
+        _logger.info(json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str))
+    except (TypeError, ValueError) as e:
+        logger.warning("Error archiving webhook payload: %s", e)
+
+
+
+
+def iter_archived_payloads(path):
+    """
+    Yield the payloads stored in an archive file (plain or gzip-rotated).
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
@@ -0,0 +1,213 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from datetime import timedelta
+from django.core.cache import cache
+from order.models import Order
+from table.models import Reservation
+from customerService.models import CustomerService
+from .models import CallInformations
+from .constants import CALL_TYPE_CHOICES
+from .CallHook import define_type
+
+
+CALL_TYPES = [choice for choice, _ in CALL_TYPE_CHOICES]
+
+# Tiers, cheapest first
+TIERS = ["cache", "records", "local", "llm"]
+
+RESULT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+MODEL_CACHE_KEY = "call_classifier_model"
+MODEL_CACHE_TIMEOUT = 60 * 60
+STATS_KEY_PREFIX = "call_classifier_hits"
+
+# Records created this long after the call ended still count as made during the call
+CALL_WINDOW_GRACE = timedelta(minutes=5)
+
+# Naive Bayes settings
+TRAINING_LIMIT = 5000
+LOCAL_CONFIDENCE_THRESHOLD = 0.9
+
+# Seed documents, so the local model is useful before there is any history
+SEED_DOCUMENTS = {
+    "order": "order ordered pizza delivery pickup deliver bestellung bestellen bestellt lieferung abholung liefern",
+    "reservation": "reservation reserve reserved table booking book guests tisch reservierung reservieren gäste buchen",
+    "service": "complaint question help problem opening hours feedback beschwerde frage hilfe problem öffnungszeiten",
+}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def _summary_key(summary):
+    digest = hashlib.sha256((summary or "").strip().lower().encode("utf-8")).hexdigest()
+    return f"call_type:{digest}"
+
+
+def _record_hit(tier):
+    key = f"{STATS_KEY_PREFIX}:{tier}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_tier_stats():
+    """
+    Return the number of calls resolved by each tier and its share of all calls.
+    """
+    counts = cache.get_many([f"{STATS_KEY_PREFIX}:{tier}" for tier in TIERS])
+    counts = {tier: counts.get(f"{STATS_KEY_PREFIX}:{tier}", 0) for tier in TIERS}
+    total = sum(counts.values())
+    return {
+        tier: {"hits": hits, "rate": hits / total if total else 0.0}
+        for tier, hits in counts.items()
+    }
+
+
+
+
+# --- Tier 1: records created by the caller during the call ---
+
+def classify_from_records(restaurant, phone, call_start, duration_seconds):
+    """
+    The agent creates the order / reservation / service record while the caller
+    is still on the line, so a record from the same phone in the call window
+    settles the type without looking at the summary.
+    """
+    if not restaurant or not phone or not call_start:
+        return None
+    try:
+        duration_seconds = float(duration_seconds or 0)
+    except (TypeError, ValueError):
+        duration_seconds = 0
+
+    call_end = call_start + timedelta(seconds=duration_seconds) + CALL_WINDOW_GRACE
+    window = {"customer__phone": phone, "created_at__gte": call_start, "created_at__lte": call_end}
+
+    if Order.objects.filter(restaurant=restaurant, **window).exists():
+        return "order"
+    if Reservation.objects.filter(table__restaurant=restaurant, **window).exists():
+        return "reservation"
+    if CustomerService.objects.filter(restaurant=restaurant, **window).exists():
+        return "service"
+    return None
+
+
+
+
+# --- Tier 2: naive Bayes trained on classified calls ---
+
+def train_local_model():
+    """
+    Build word counts per call type from the seed documents and the latest
+    classified calls.
+    """
+    word_counts = {call_type: Counter(tokenize(SEED_DOCUMENTS.get(call_type))) for call_type in CALL_TYPES}
+    doc_counts = Counter({call_type: 1 for call_type in CALL_TYPES})
+
+    history = (
+        CallInformations.objects.filter(type__in=CALL_TYPES)
+        .exclude(summary="")
+        .order_by("-id")
+        .values_list("type", "summary")[:TRAINING_LIMIT]
+    )
+    for call_type, summary in history:
+        word_counts[call_type].update(tokenize(summary))
+        doc_counts[call_type] += 1
+
+    vocabulary = set()
+    for counts in word_counts.values():
+        vocabulary.update(counts)
+
+    return {
+        "word_counts": {call_type: dict(counts) for call_type, counts in word_counts.items()},
+        "totals": {call_type: sum(counts.values()) for call_type, counts in word_counts.items()},
+        "doc_counts": dict(doc_counts),
+        "vocabulary_size": len(vocabulary),
+    }
+
+
+def get_local_model():
+    model = cache.get(MODEL_CACHE_KEY)
+    if model is None:
+        model = train_local_model()
+        cache.set(MODEL_CACHE_KEY, model, MODEL_CACHE_TIMEOUT)
+    return model
+
+
+def classify_locally(summary, model=None):
+    """
+    Return (call_type, confidence) from the naive Bayes model, or (None, 0.0)
+    when the summary has no known words.
+    """
+    model = model or get_local_model()
+    tokens = tokenize(summary)
+    if not tokens:
+        return None, 0.0
+
+    total_docs = sum(model["doc_counts"].values())
+    vocabulary_size = model["vocabulary_size"] or 1
+    scores = {}
+    for call_type in CALL_TYPES:
+        counts = model["word_counts"].get(call_type, {})
+        denominator = model["totals"].get(call_type, 0) + vocabulary_size
+        score = math.log(model["doc_counts"].get(call_type, 1) / total_docs)
+        for token in tokens:
+            score += math.log((counts.get(token, 0) + 1) / denominator)
+        scores[call_type] = score
+
+    # Softmax over log scores gives the posterior
+    best = max(scores, key=scores.get)
+    top = scores[best]
+    normalizer = sum(math.exp(score - top) for score in scores.values())
+    return best, 1 / normalizer
+
+
+
+
+# --- Entry point ---
+
+def classify_call(call_info, restaurant=None):
+    """
+    Return the call type of a CallInformations row, trying the cached result,
+    the caller's records, the local model and finally the LLM.
+    """
+    summary_key = _summary_key(call_info.summary) if (call_info.summary or "").strip() else None
+
+    tier, call_type = "cache", cache.get(summary_key) if summary_key else None
+
+    if not call_type:
+        tier = "records"
+        call_type = classify_from_records(
+            restaurant,
+            call_info.phone,
+            call_info.call_date_utc,
+            call_info.duration_seconds,
+        )
+
+    if not call_type:
+        tier = "local"
+        call_type, confidence = classify_locally(call_info.summary)
+        if confidence < LOCAL_CONFIDENCE_THRESHOLD:
+            call_type = None
+
+    if not call_type:
+        tier = "llm"
+        call_type = define_type(call_info.summary)
+        if call_type not in CALL_TYPES:
+            call_type = "service"
+
+    # Record-based answers describe this call only, not the summary text
+    if summary_key and tier in ("local", "llm"):
+        cache.set(summary_key, call_type, RESULT_CACHE_TIMEOUT)
+
+    _record_hit(tier)
+    return call_type
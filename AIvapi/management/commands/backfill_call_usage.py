@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from AIvapi.models import Assistance, CallInformations, CallUsage
+from AIvapi.usage import parse_duration_seconds
+from accounts.snapshot import invalidate_restaurant_full_data
+
+
+class Command(BaseCommand):
+    help = "Fill CallInformations.duration_secs from the string durations and rebuild the CallUsage ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        # 1. Numeric durations
+        updated = 0
+        batch = []
+        for call in CallInformations.objects.only("id", "duration_seconds", "duration_secs").iterator(chunk_size=batch_size):
+            duration_secs = parse_duration_seconds(call.duration_seconds)
+            if call.duration_secs != duration_secs:
+                call.duration_secs = duration_secs
+                batch.append(call)
+            if len(batch) >= batch_size:
+                CallInformations.objects.bulk_update(batch, ["duration_secs"])
+                updated += len(batch)
+                batch = []
+        if batch:
+            CallInformations.objects.bulk_update(batch, ["duration_secs"])
+            updated += len(batch)
+        self.stdout.write(f"Updated duration_secs on {updated} calls")
+
+        # 2. Ledger, one row per restaurant and month, rebuilt in place in one
+        # transaction. The webhooks add to these rows with F() updates in the
+        # same transaction as the call insert. Locking the rows first makes
+        # those updates wait for the rebuild, then apply on top of it. The
+        # totals are read after the locks, so a call committed before them is
+        # counted once. A call still uncommitted at that point is left to its
+        # own increment. Rows keep their id so no pending update is lost.
+        restaurant_by_assistant = dict(Assistance.objects.values_list("assistant_id", "restaurant_id"))
+        with transaction.atomic():
+            existing = {
+                (usage.restaurant_id, usage.period_start): usage
+                for usage in CallUsage.objects.select_for_update()
+            }
+            rows = (
+                CallInformations.objects.filter(assistant_id__in=restaurant_by_assistant.keys())
+                .annotate(period=TruncMonth(Coalesce("call_date_utc", "created_at")))
+                .values("assistant_id", "period")
+                .annotate(seconds=Sum("duration_secs"), cost=Sum("cost"), calls=Count("id"))
+                .order_by()
+            )
+
+            usage = []
+            for row in rows:
+                restaurant_id = restaurant_by_assistant[row["assistant_id"]]
+                period_start = row["period"].date()
+                entry = existing.pop((restaurant_id, period_start), None)
+                if entry is None:
+                    entry = CallUsage(restaurant_id=restaurant_id, period_start=period_start)
+                entry.total_seconds = row["seconds"] or 0
+                entry.total_cost = row["cost"] or 0
+                entry.call_count = row["calls"]
+                entry.updated_at = timezone.now()
+                usage.append(entry)
+
+            CallUsage.objects.bulk_update(
+                [entry for entry in usage if entry.pk],
+                ["total_seconds", "total_cost", "call_count", "updated_at"],
+                batch_size=batch_size,
+            )
+            CallUsage.objects.bulk_create([entry for entry in usage if not entry.pk], batch_size=batch_size)
+            # Months without any call left
+            CallUsage.objects.filter(id__in=[entry.id for entry in existing.values()]).delete()
+
+        for restaurant_id in set(restaurant_by_assistant.values()):
+            invalidate_restaurant_full_data(restaurant_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(usage)} usage rows"))
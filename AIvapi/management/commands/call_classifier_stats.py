@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from AIvapi.classifier import get_tier_stats
+
+
+class Command(BaseCommand):
+    help = "Show how many calls each call-type classifier tier resolved."
+
+    def handle(self, *args, **options):
+        stats = get_tier_stats()
+        total = sum(tier["hits"] for tier in stats.values())
+        for tier, values in stats.items():
+            self.stdout.write(f"{tier:<8} {values['hits']:>8}  {values['rate']:.1%}")
+        self.stdout.write(f"{'total':<8} {total:>8}")
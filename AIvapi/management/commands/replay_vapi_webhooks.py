@@ -0,0 +1,64 @@
+import time
+from itertools import islice
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from AIvapi.archive import iter_archived_payloads
+
+
+class Command(BaseCommand):
+    help = "Replay archived Vapi webhook payloads against the webhook endpoint (load testing)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="*",
+            help="Archive files to replay (.jsonl or rotated .gz). Defaults to VAPI_ARCHIVE_PATH.",
+        )
+        parser.add_argument("--url", default="http://localhost:8000/vapi-webhook/", help="Webhook URL to post to.")
+        parser.add_argument("--concurrency", type=int, default=1, help="Number of parallel requests.")
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many payloads (0 = all).")
+        parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds.")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or [settings.VAPI_ARCHIVE_PATH]
+
+        def read_payloads():
+            for path in paths:
+                try:
+                    yield from iter_archived_payloads(path)
+                except OSError as e:
+                    raise CommandError(f"Cannot read {path}: {e}")
+
+        # Stop reading the archives once the limit is reached
+        payloads = list(islice(read_payloads(), options["limit"] or None))
+        if not payloads:
+            self.stdout.write("No payloads to replay.")
+            return
+
+        url = options["url"]
+        timeout = options["timeout"]
+
+        def post(payload):
+            started = time.perf_counter()
+            try:
+                response = requests.post(url, json=payload, timeout=timeout)
+                result = response.status_code
+            except requests.RequestException as e:
+                result = type(e).__name__
+            return result, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(options["concurrency"], 1)) as executor:
+            results = list(executor.map(post, payloads))
+        elapsed = time.perf_counter() - started
+
+        statuses = Counter(result for result, _ in results)
+        latencies = sorted(latency for _, latency in results)
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+
+        self.stdout.write(f"Replayed {len(results)} payloads in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s)")
+        self.stdout.write(f"Latency avg {sum(latencies) / len(latencies) * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms")
+        for result, count in statuses.most_common():
+            self.stdout.write(f"  {result}: {count}")
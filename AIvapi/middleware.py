@@ -0,0 +1,110 @@
+import json
+import re
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import JsonResponse
+
+
+VAPI_WEBHOOK_PATH = "/vapi-webhook/"
+
+# Only end-of-call reports are stored, every other message type is acknowledged as ignored
+FINAL_MESSAGE_TYPE = "end-of-call-report"
+
+# message.type is looked up in this many bytes of the body at most
+SNIFF_LIMIT = 64 * 1024
+
+JSON_DECODER = json.JSONDecoder()
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+
+
+
+def _skip_whitespace(text, index):
+    return WHITESPACE_RE.match(text, index).end()
+
+
+def _member_index(text, index, name):
+    """
+    Index of the value of member `name` in the JSON object starting at
+    text[index], or None. The values of the members before it are skipped
+    with the C decoder; raises ValueError on malformed or cut JSON.
+    """
+    if text[index:index + 1] != "{":
+        return None
+    index = _skip_whitespace(text, index + 1)
+    while text[index:index + 1] == '"':
+        key, index = json.decoder.scanstring(text, index + 1)
+        index = _skip_whitespace(text, index)
+        if text[index:index + 1] != ":":
+            return None
+        index = _skip_whitespace(text, index + 1)
+        if key == name:
+            return index
+        _, index = JSON_DECODER.raw_decode(text, index)
+        index = _skip_whitespace(text, index)
+        if text[index:index + 1] != ",":
+            return None
+        index = _skip_whitespace(text, index + 1)
+    return None
+
+
+def sniff_message_type(body):
+    """
+    Return message.type of a Vapi payload, or None when it is not found in the
+    first SNIFF_LIMIT bytes. Only the top-level object and the message object
+    are walked; nested values such as the assistant config, whose
+    serverMessages list names every message type, are skipped whole.
+    """
+    text = body[:SNIFF_LIMIT].decode("utf-8", "ignore")
+    try:
+        index = _member_index(text, _skip_whitespace(text, 0), "message")
+        if index is not None:
+            index = _member_index(text, index, "type")
+        if index is None:
+            return None
+        message_type, _ = JSON_DECODER.raw_decode(text, index)
+    except ValueError:
+        return None
+    return message_type if isinstance(message_type, str) else None
+
+
+def sniff_ignored_vapi_message(request):
+    """
+    Return the 'ignored' response for a non-final Vapi message, or None when the
+    request has to go through the webhook view. Works on the raw body only.
+    """
+    if request.method != "POST" or request.path != VAPI_WEBHOOK_PATH:
+        return None
+
+    message_type = sniff_message_type(request.body)
+    if message_type is None or message_type == FINAL_MESSAGE_TYPE:
+        return None
+    return JsonResponse({"status": "ignored", "reason": message_type})
+
+
+
+
+class VapiWebhookFastPathMiddleware:
+    """
+    Acknowledge status / speech / transcript / tool-call messages sent to the Vapi
+    webhook before sessions, auth and DRF parsing run. Must be first in MIDDLEWARE.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return sniff_ignored_vapi_message(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        response = sniff_ignored_vapi_message(request)
+        if response is not None:
+            return response
+        return await self.get_response(request)
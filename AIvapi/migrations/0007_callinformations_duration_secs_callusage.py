@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIvapi', '0006_alter_assistance_speed_alter_assistance_voice'),
+        ('restaurants', '0010_openandclosetime_is_closed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callinformations',
+            name='duration_secs',
+            field=models.FloatField(default=0, help_text='Numeric copy of duration_seconds, used for usage totals.'),
+        ),
+        migrations.CreateModel(
+            name='CallUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(help_text='First day of the billing month')),
+                ('total_seconds', models.FloatField(default=0)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('call_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='call_usage', to='restaurants.restaurant')),
+            ],
+            options={
+                'unique_together': {('restaurant', 'period_start')},
+            },
+        ),
+    ]
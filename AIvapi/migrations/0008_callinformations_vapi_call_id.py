@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIvapi', '0007_callinformations_duration_secs_callusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callinformations',
+            name='vapi_call_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -49,9 +49,11 @@ class Assistance(models.Model):
 
 
 class CallInformations(models.Model):
+    vapi_call_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
     type = models.CharField(max_length=100,choices=CALL_TYPE_CHOICES,blank=True , null = True)
     call_date_utc = models.DateTimeField(null=True, blank=True)
     duration_seconds = models.CharField(max_length=100)
+    duration_secs = models.FloatField(default=0, help_text="Numeric copy of duration_seconds, used for usage totals.")
     summary = models.TextField()
     recording = models.CharField(max_length=1000)
     phone = models.CharField(max_length=15,null=True, blank=True)
@@ -63,11 +65,22 @@ class CallInformations(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
-    
 
 
 
 
+class CallUsage(models.Model):
+    """Per-restaurant, per-month ledger of Vapi call usage, updated on ingest."""
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='call_usage')
+    period_start = models.DateField(help_text="First day of the billing month")
+    total_seconds = models.FloatField(default=0)
+    total_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    call_count = models.PositiveIntegerField(default=0)
 
+    updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        unique_together = ('restaurant', 'period_start')
+
+    def __str__(self):
+        return f"{self.restaurant.resturent_name} - {self.period_start:%Y-%m}"
@@ -0,0 +1,30 @@
+from celery import shared_task
+from Channel.events import publish
+from .models import Assistance, CallInformations
+from .serializers import CallInformationsSerializer
+from .CallHook import callback_required
+from .classifier import classify_call
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def classify_call_information(self, call_id):
+    """Classify a stored call (type + callback) and push the update to the restaurant"""
+    call_info = CallInformations.objects.filter(id=call_id).first()
+    if not call_info or call_info.type:
+        return None
+
+    assistance = Assistance.objects.filter(assistant_id=call_info.assistant_id).select_related("restaurant").first()
+    restaurant = assistance.restaurant if assistance else None
+
+    try:
+        call_type = classify_call(call_info, restaurant)
+    except RuntimeError as exc:
+        raise self.retry(exc=exc)
+
+    call_info.type = call_type
+    call_info.callback = callback_required(restaurant, call_type, call_info.call_date_utc) if restaurant else True
+    call_info.save(update_fields=["type", "callback", "updated_at"])
+
+    if restaurant:
+        publish(restaurant.id, "call_information_updated", "call", CallInformationsSerializer(call_info).data)
+    return call_type
@@ -0,0 +1,68 @@
+from decimal import Decimal, InvalidOperation
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import CallUsage
+
+
+
+
+def parse_duration_seconds(value):
+    """
+    Convert a stored duration ("42", "42.5", "", None ...) to float seconds.
+    """
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _period_start(call_date):
+    """
+    First day of the call's month in TIME_ZONE, like the TruncMonth of
+    backfill_call_usage: a call at 00:30 on the 1st, local time, belongs to
+    the new month although it is still the previous one in UTC.
+    """
+    call_date = call_date or timezone.now()
+    if isinstance(call_date, str):
+        call_date = timezone.datetime.fromisoformat(call_date)
+    if timezone.is_naive(call_date):
+        # A naive value is stored, and read back, in TIME_ZONE
+        call_date = timezone.make_aware(call_date)
+    return timezone.localdate(call_date).replace(day=1)
+
+
+
+
+def record_call_usage(restaurant_id, seconds, cost, call_date=None):
+    """
+    Add one call to the restaurant's ledger row of the call's month.
+    Uses F() expressions so concurrent webhooks don't lose updates.
+    """
+    try:
+        cost = Decimal(str(cost or 0))
+    except InvalidOperation:
+        cost = Decimal(0)
+
+    usage, _ = CallUsage.objects.get_or_create(
+        restaurant_id=restaurant_id,
+        period_start=_period_start(call_date),
+    )
+    CallUsage.objects.filter(id=usage.id).update(
+        total_seconds=F('total_seconds') + seconds,
+        total_cost=F('total_cost') + cost,
+        call_count=F('call_count') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+
+
+async def aget_used_seconds(restaurant, period_start=None):
+    """
+    Total seconds used by a restaurant, for all time or for one billing month.
+    """
+    usage = CallUsage.objects.filter(restaurant=restaurant)
+    if period_start:
+        usage = usage.filter(period_start=period_start)
+    usage = await usage.aaggregate(total=Sum('total_seconds'))
+    return usage['total'] or 0
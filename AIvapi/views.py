@@ -10,17 +10,19 @@ import requests
 from rest_framework import status
 import re
 from .CallHook import vapi_webhook
+from accounts.async_views import AsyncAPIView, api_response, run_in_thread_pool
+from .tasks import classify_call_information
+from .usage import parse_duration_seconds, record_call_usage
+from django.db import transaction, IntegrityError
 from .models import Assistance
 from .agent import AGENT
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from rest_framework.permissions import AllowAny
 from django.utils.dateparse import parse_datetime
 from rest_framework.exceptions import ValidationError
 from datetime import datetime
 from .update_agent import UpdateAgent
-from restaurants.models import Restaurant,OpenAndCloseTime
-import pytz
+from restaurants.models import Restaurant
 from accounts.permissions import IsAdminOrOwner,IsAdminRole
 from customer.models import Customer
 from .delete_agent import delete_agent
@@ -276,11 +278,12 @@ class UpdateTwilioCredsAPIView(APIView):
 
 
 
-class VapiWebhookAsyncAPIView(APIView):
-    permission_classes = [AllowAny]
+class VapiWebhookAsyncAPIView(AsyncAPIView):
     """
-    Async DRF view for handling VAPI webhooks.
+    Native async view for VAPI webhooks.
+    Non-final messages are already answered by AIvapi.middleware.
     """
+
     request_body_schema = openapi.Schema(
         type=openapi.TYPE_OBJECT,
         properties={
@@ -296,7 +299,7 @@ class VapiWebhookAsyncAPIView(APIView):
         request_body=request_body_schema,
         responses={
             200: openapi.Response(
-                description="Webhook ignored",
+                description="Webhook ignored, or call already stored (duplicate delivery)",
                 examples={"application/json": {"status": "ignored", "reason": "not end-of-call-report"}}
             ),
             201: openapi.Response(
@@ -308,73 +311,77 @@ class VapiWebhookAsyncAPIView(APIView):
         ,
         tags=['VAPI']
     )
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         try:
-            parsed = vapi_webhook(request)
+            parsed = vapi_webhook(request.data)
 
             if parsed.get("status") == "ignored":
-                return Response(parsed, status=status.HTTP_200_OK)
-            
-
-            assistant_id = parsed.get("assistant_id")
-            assistance = Assistance.objects.get(assistant_id=assistant_id)
-            restaurant = assistance.restaurant
-
-            call_date_utc = parsed.get("call_date")  # Should be in ISO format or datetime
-            call_datetime = datetime.fromisoformat(call_date_utc) if isinstance(call_date_utc, str) else call_date_utc
+                return api_response(parsed, status=status.HTTP_200_OK)
 
-            local_tz = pytz.timezone('Europe/Berlin')
-            call_datetime_local = call_datetime.astimezone(local_tz)
-            call_time = call_datetime_local.time()
+            # Vapi retries deliveries, a known call id is answered with the stored row
+            call_id = parsed.get("call_id")
+            if call_id:
+                existing = await CallInformations.objects.filter(vapi_call_id=call_id).afirst()
+                if existing:
+                    return api_response(CallInformationsSerializer(existing).data, status=status.HTTP_200_OK)
 
-            callback_value = True  
 
-            if parsed.get("type") == "order":
-                local_tz = pytz.timezone('Europe/Berlin')
-                call_datetime_local = call_datetime.astimezone(local_tz)
-                call_time = call_datetime_local.time()
-                day_of_week = call_datetime_local.strftime('%A').lower()
-
-                callback_value = True 
-                try:
-                    day_schedule = OpenAndCloseTime.objects.get(restaurant=restaurant, day_of_week=day_of_week)
-                except OpenAndCloseTime.DoesNotExist:
-                    day_schedule = None
-
-                if day_schedule:
-                    if day_schedule.is_closed:
-                        callback_value = False
-                    elif day_schedule.opening_time and day_schedule.closing_time:
-                        if not (day_schedule.opening_time <= call_time <= day_schedule.closing_time):
-                            callback_value = False
+            # Fail early for unknown assistants, the row would never reach a restaurant
+            assistance = await Assistance.objects.aget(assistant_id=parsed.get("assistant_id"))
 
 
             phone_number = parsed.get("phone")
             customer_name = None
             if phone_number:
-                customer = Customer.objects.filter(phone=phone_number).first()
+                customer = await Customer.objects.filter(phone=phone_number).afirst()
                 if customer:
                     customer_name = customer.customer_name
 
-            # Save to DB
-            call_info = CallInformations.objects.create(
-                type=parsed.get("type"),
-                call_date_utc=parsed.get("call_date"),
-                phone = parsed.get("phone"),
-                duration_seconds=str(parsed.get("duration_seconds") or 0),
-                summary=parsed.get("summary") or "",
-                recording=parsed.get("recording") or "",
-                callback=callback_value,
-                assistant_id=parsed.get("assistant_id") or "",
-                cost=parsed.get("cost") or 0,
-                customer_name=customer_name
-            )
+            try:
+                call_info = await run_in_thread_pool(store_call_information)(parsed, assistance, customer_name)
+            except IntegrityError:
+                # A concurrent retry of the same call won the insert
+                existing = await CallInformations.objects.filter(vapi_call_id=call_id).afirst() if call_id else None
+                if not existing:
+                    raise
+                return api_response(CallInformationsSerializer(existing).data, status=status.HTTP_200_OK)
 
             serializer = CallInformationsSerializer(call_info)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return api_response(serializer.data, status=status.HTTP_201_CREATED)
 
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return api_response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+
+
+def store_call_information(parsed, assistance, customer_name):
+    """
+    Save the call together with the usage ledger and queue its classification.
+    """
+    duration_secs = parse_duration_seconds(parsed.get("duration_seconds"))
+
+    with transaction.atomic():
+        call_info = CallInformations.objects.create(
+            vapi_call_id=parsed.get("call_id"),
+            type=parsed.get("type"),
+            call_date_utc=parsed.get("call_date"),
+            phone = parsed.get("phone"),
+            duration_seconds=str(parsed.get("duration_seconds") or 0),
+            duration_secs=duration_secs,
+            summary=parsed.get("summary") or "",
+            recording=parsed.get("recording") or "",
+            callback=True,
+            assistant_id=parsed.get("assistant_id") or "",
+            cost=parsed.get("cost") or 0,
+            customer_name=customer_name
+        )
+        record_call_usage(assistance.restaurant_id, duration_secs, parsed.get("cost"), parsed.get("call_date"))
+
+        # Type and callback are filled in by the worker, outside the request
+        transaction.on_commit(lambda: classify_call_information.delay(call_info.id))
+
+    return call_info
 
 
 
@@ -104,6 +104,20 @@ class RestaurantConsumer(AsyncWebsocketConsumer):
             "data": event["reservation"]
         }))
 
-    
 
-    
\ No newline at end of file
+    # --- Call Information Events ---
+
+    async def call_information_updated(self, event):
+        await self.send(text_data=json.dumps({
+            "event": "call_information_updated",
+            "data": event["call"]
+        }))
+
+
+    # --- Batched Events (see Channel.events) ---
+
+    async def events_batch(self, event):
+        for item in event["events"]:
+            handler = getattr(self, item["type"], None)
+            if handler is not None:
+                await handler(item)
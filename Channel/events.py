@@ -0,0 +1,84 @@
+import logging
+from collections import OrderedDict
+from contextvars import ContextVar
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+# Events of the current HTTP request, set by Channel.middleware.ChannelEventsMiddleware.
+# Outside a request (Celery, shell) events are sent as soon as they are committed.
+_request_events = ContextVar("channel_request_events", default=None)
+
+
+
+
+def publish(restaurant_id, event_type, key, data):
+    """
+    Queue a websocket event for the restaurant group, e.g.
+    publish(restaurant.id, "order_created", "order", data).
+
+    Nothing is sent unless the surrounding transaction commits, and sending
+    errors are only logged.
+    """
+    event = {"type": event_type, key: data}
+    transaction.on_commit(lambda: _committed(restaurant_id, event))
+
+
+def _committed(restaurant_id, event):
+    events = _request_events.get()
+    if events is not None:
+        events.append((restaurant_id, event))
+    else:
+        send_events([(restaurant_id, event)])
+
+
+
+
+def _group_messages(events):
+    """One message per restaurant group; several events travel as one batch."""
+    grouped = OrderedDict()
+    for restaurant_id, event in events:
+        grouped.setdefault(f"restaurant_{restaurant_id}", []).append(event)
+
+    for group, group_events in grouped.items():
+        if len(group_events) == 1:
+            yield group, group_events[0]
+        else:
+            yield group, {"type": "events_batch", "events": group_events}
+
+
+def send_events(events):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for group, message in _group_messages(events):
+        try:
+            async_to_sync(channel_layer.group_send)(group, message)
+        except Exception:
+            logger.exception("Failed to publish websocket event to %s", group)
+
+
+async def asend_events(events):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for group, message in _group_messages(events):
+        try:
+            await channel_layer.group_send(group, message)
+        except Exception:
+            logger.exception("Failed to publish websocket event to %s", group)
+
+
+
+
+def start_request_events():
+    """Start collecting committed events for the current request."""
+    events = []
+    return events, _request_events.set(events)
+
+
+def stop_request_events(token):
+    _request_events.reset(token)
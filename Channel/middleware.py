@@ -3,6 +3,9 @@ from accounts.models import User
 from asgiref.sync import sync_to_async
 from rest_framework_simplejwt.tokens import AccessToken
 from urllib.parse import parse_qs
+import asyncio
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .events import start_request_events, stop_request_events, send_events, asend_events
 
 
 
@@ -59,3 +62,51 @@ class ProtocolAcceptMiddleware:
         return await self.app(scope, receive, wrapped_send)
 
 
+
+
+
+
+# Keeps a reference to the pending background sends until they finish
+_background_sends = set()
+
+
+class ChannelEventsMiddleware:
+    """
+    Collect the websocket events committed while handling a request (see
+    Channel.events.publish) and send them once the response is ready, one
+    group_send per restaurant. Under ASGI the sending happens in the
+    background, so the response never waits on the channel layer.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        events, token = start_request_events()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_request_events(token)
+        if events:
+            send_events(events)
+        return response
+
+    async def __acall__(self, request):
+        events, token = start_request_events()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_request_events(token)
+        if events:
+            task = asyncio.ensure_future(asend_events(events))
+            _background_sends.add(task)
+            task.add_done_callback(_background_sends.discard)
+        return response
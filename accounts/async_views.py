@@ -0,0 +1,127 @@
+import json
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse, JsonResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.permissions import AllowAny
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+
+
+
+def api_response(data, status=200):
+    """JSON response encoded like DRF's (Decimal, datetime, time ...)."""
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def run_in_thread_pool(func):
+    """
+    sync_to_async() for the write paths: a DRF serializer's validation and
+    save with its whole atomic() block, which the async ORM cannot run
+    (transactions are not supported in async code). Reads use the async ORM.
+
+    Runs with thread_sensitive=False, so concurrent requests are spread over
+    the executor threads instead of queueing on the single thread-sensitive
+    one. Every call gets its connection recycled like a request would, as
+    Django does not manage the connections of executor threads itself.
+    """
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await sync_to_async(call, thread_sensitive=False)(*args, **kwargs)
+
+    return wrapper
+
+
+
+
+class AsyncAPIView(APIView):
+    """
+    Base class for the public webhook endpoints served natively under ASGI.
+
+    It is an APIView only for the schema: swagger_auto_schema, parser_classes
+    and permission_classes document the endpoint as before. dispatch() is
+    native async and skips DRF's request wrapping, authentication and
+    throttling: the body is parsed into `request.data` (JSON, or form data
+    when the view's parser_classes allow it). DRF ValidationErrors become 400
+    responses and the other exceptions go through handle_exception(), so the
+    handlers read like the APIView ones.
+    """
+    http_method_names = ["post", "options"]
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+
+    FORM_MEDIA_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+    def parse_body(self, request):
+        """Body as a dict (a QueryDict for form data, like DRF's), or an error response."""
+        media_types = {parser.media_type for parser in self.parser_classes}
+        content_type = request.content_type
+
+        if content_type in self.FORM_MEDIA_TYPES and content_type in media_types:
+            # Same as DRF: repeated fields are kept, uploaded files are merged in
+            data = request.POST.copy()
+            data.update(request.FILES)
+            return data, None
+        if content_type == "application/json" or not request.body:
+            try:
+                data = json.loads(request.body or b"{}")
+            except ValueError:
+                return None, api_response({"error": "Invalid JSON body"}, status=400)
+            if not isinstance(data, dict):
+                return None, api_response({"error": "JSON object expected"}, status=400)
+            return data, None
+        return None, api_response({"detail": f'Unsupported media type "{content_type}" in request.'}, status=415)
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        if method not in self.http_method_names:
+            return api_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        if method == "options":
+            return await self.options(request, *args, **kwargs)
+
+        data, error = self.parse_body(request)
+        if error is not None:
+            return error
+        request.data = data
+
+        try:
+            return await getattr(self, method)(request, *args, **kwargs)
+        except ValidationError as e:
+            return api_response(e.detail, status=400)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    def handle_exception(self, exc):
+        """
+        APIView.handle_exception() answering with a plain JSON response, as
+        there is no DRF request to render a Response. A DoesNotExist left
+        uncaught by the handler is a 404, like get_object_or_404() would give.
+        """
+        handled = Http404(str(exc)) if isinstance(exc, ObjectDoesNotExist) else exc
+        response = self.get_exception_handler()(handled, self.get_exception_handler_context())
+        if response is None:
+            raise exc
+
+        json_response = api_response(response.data, status=response.status_code)
+        for header, value in response.headers.items():
+            if header.lower() != "content-type":
+                json_response.headers[header] = value
+        return json_response
+
+    async def options(self, request, *args, **kwargs):
+        response = HttpResponse()
+        response.headers["Allow"] = ", ".join(self._allowed_methods())
+        response.headers["Content-Length"] = "0"
+        return response
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import statistics
+import time
+from datetime import time as clock, timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test.utils import override_settings
+from django.utils import timezone
+from AIvapi.middleware import VAPI_WEBHOOK_PATH
+from customer.models import Customer
+from items.models import Item
+from restaurants.models import Restaurant
+from table.models import Table, Reservation
+
+
+BENCHMARK_TWILIO_NUMBER = "+10000000000"
+
+FAST_PATH_MIDDLEWARE = "AIvapi.middleware.VapiWebhookFastPathMiddleware"
+
+VAPI_MESSAGE_TYPES = [
+    "assistant-request", "end-of-call-report", "function-call", "hang", "model-output",
+    "speech-update", "status-update", "tool-calls", "transcript", "user-interrupted",
+]
+
+
+def vapi_message(message_type):
+    """A Vapi webhook body of the given type, shaped like the ones Vapi sends during a call."""
+    return {
+        "message": {
+            "timestamp": 1760000000000,
+            # Listed before the type, so the fast path has to skip it
+            "assistant": {
+                "name": "Benchmark",
+                "serverMessages": VAPI_MESSAGE_TYPES,
+                "model": {"provider": "openai", "messages": [{"role": "system", "content": "Prompt " * 800}]},
+            },
+            "call": {"id": "benchmark-call", "type": "inboundPhoneCall"},
+            "artifact": {"messages": [{"role": "user", "message": "Hello " * 20} for _ in range(20)]},
+            "type": message_type,
+            "status": "in-progress",
+        }
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent POSTs through the project's ASGI application in-process and report the "
+        "throughput per concurrency level. Without --body, a generated restaurant is queried on "
+        "/restaurants/full-data/ and deleted afterwards. Run it against a Postgres / Redis setup "
+        "like production's and compare checkouts to measure a change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/restaurants/full-data/")
+        parser.add_argument("--body", help="JSON body to send instead of the generated restaurant's twilio_number.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level.")
+        parser.add_argument("--concurrency", default="1,10,50", help="Comma separated concurrency levels.")
+        parser.add_argument("--caller", action="store_true", help="Ask full-data for a caller profile too.")
+        parser.add_argument("--tables", type=int, default=20)
+        parser.add_argument("--customers", type=int, default=500)
+        parser.add_argument(
+            "--vapi-message", metavar="TYPE",
+            help=f"Send a Vapi message of this type to {VAPI_WEBHOOK_PATH} instead, e.g. status-update.",
+        )
+        parser.add_argument(
+            "--without-fast-path", action="store_true",
+            help=f"Leave {FAST_PATH_MIDDLEWARE} out, to compare against it.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency takes comma separated integers, e.g. 1,10,50.")
+
+        restaurant = None
+        path = options["path"]
+        if options["vapi_message"]:
+            path = VAPI_WEBHOOK_PATH
+            body = json.dumps(vapi_message(options["vapi_message"])).encode()
+        elif options["body"]:
+            body = options["body"].encode()
+        else:
+            restaurant = self.generate(options["tables"], options["customers"])
+            payload = {"twilio_number": BENCHMARK_TWILIO_NUMBER}
+            if options["caller"]:
+                payload["caller_phone"] = "+bench0"
+            body = json.dumps(payload).encode()
+
+        try:
+            middleware = settings.MIDDLEWARE
+            if options["without_fast_path"]:
+                middleware = [name for name in middleware if name != FAST_PATH_MIDDLEWARE]
+            with override_settings(MIDDLEWARE=middleware):
+                app = get_asgi_application()
+            self.stdout.write(f"POST {path}, {len(body)} bytes")
+            for level in levels:
+                rate, latencies, statuses = asyncio.run(self.run(app, path, body, level, options["requests"]))
+                latencies.sort()
+                p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+                self.stdout.write(
+                    f"  concurrency {level:>4}: {rate:8.1f} req/s  avg {statistics.mean(latencies):7.1f}ms  "
+                    f"p95 {p95:7.1f}ms  statuses {dict(statuses)}"
+                )
+        finally:
+            close_old_connections()
+            if restaurant is not None:
+                Customer.objects.filter(phone__startswith="+bench").delete()
+                restaurant.owner.delete()
+                self.stdout.write("Deleted the generated restaurant.")
+
+    def generate(self, tables, customers):
+        owner = get_user_model().objects.create(username="benchmark-webhooks", email="benchmark-webhooks@example.invalid")
+        restaurant = Restaurant.objects.create(
+            resturent_name="Benchmark", address="-", owner=owner, twilio_number=BENCHMARK_TWILIO_NUMBER
+        )
+        Item.objects.bulk_create([
+            Item(restaurant=restaurant, item_name=f"Item {i}", price=10, descriptions="-", category="-")
+            for i in range(50)
+        ])
+        table_rows = Table.objects.bulk_create([
+            Table(restaurant=restaurant, table_name=f"B{i}", total_set=4) for i in range(tables)
+        ])
+        customer_rows = Customer.objects.bulk_create([
+            Customer(customer_name=f"Customer {i}", phone=f"+bench{i}") for i in range(customers)
+        ])
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        Reservation.objects.bulk_create([
+            Reservation(
+                table=table_rows[i % tables], customer=customer, guest_no=2, date=tomorrow + timedelta(days=i // (tables * 6)),
+                from_time=clock(10 + 2 * (i // tables % 6)), to_time=clock(11 + 2 * (i // tables % 6)),
+            )
+            for i, customer in enumerate(customer_rows)
+        ])
+        self.stdout.write(f"Generated a restaurant with {tables} tables and {customers} customers / reservations.")
+        return restaurant
+
+    async def run(self, app, path, body, concurrency, total):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = {}
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                status = await self.request(app, path, body)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - started), latencies, statuses
+
+    @staticmethod
+    async def request(app, path, body):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        done = asyncio.Event()
+        received = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Django listens for a disconnect while the view runs
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        response = {}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+
+        await app(scope, receive, send)
+        done.set()
+        return response.get("status")
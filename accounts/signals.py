@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from restaurants.models import Restaurant, OpenAndCloseTime
+from items.models import Item
+from table.models import Table, Reservation
+from extras.models import Extra
+from delivery_management.models import AreaManagement
+from order.models import Order
+from customerService.models import CustomerService
+from customer.models import Customer
+from subscription.models import Subscription
+from AIvapi.models import Assistance, CallInformations
+from .snapshot import invalidate_restaurant_full_data
+
+
+
+def invalidate_full_data_on_commit(restaurant_ids):
+    """
+    Invalidate the call-context snapshots once the surrounding transaction commits,
+    so a concurrent rebuild cannot cache data that is about to change.
+    """
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id}
+    if not restaurant_ids:
+        return
+
+    def invalidate():
+        for restaurant_id in restaurant_ids:
+            invalidate_restaurant_full_data(restaurant_id)
+
+    transaction.on_commit(invalidate)
+
+
+
+
+@receiver(post_save, sender=Restaurant)
+def restaurant_changed(sender, instance, **kwargs):
+    invalidate_full_data_on_commit([instance.id])
+
+
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+@receiver(post_save, sender=Extra)
+@receiver(post_delete, sender=Extra)
+@receiver(post_save, sender=AreaManagement)
+@receiver(post_delete, sender=AreaManagement)
+@receiver(post_save, sender=OpenAndCloseTime)
+@receiver(post_delete, sender=OpenAndCloseTime)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=CustomerService)
+@receiver(post_delete, sender=CustomerService)
+def restaurant_data_changed(sender, instance, **kwargs):
+    invalidate_full_data_on_commit([instance.restaurant_id])
+
+
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def reservation_changed(sender, instance, **kwargs):
+    restaurant_ids = Table.objects.filter(id=instance.table_id).values_list("restaurant_id", flat=True)
+    invalidate_full_data_on_commit(restaurant_ids)
+
+
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    restaurant_ids = Restaurant.objects.filter(owner_id=instance.user_id).values_list("id", flat=True)
+    invalidate_full_data_on_commit(restaurant_ids)
+
+
+
+
+@receiver(post_save, sender=CallInformations)
+@receiver(post_delete, sender=CallInformations)
+def call_information_changed(sender, instance, **kwargs):
+    restaurant_ids = Assistance.objects.filter(assistant_id=instance.assistant_id).values_list("restaurant_id", flat=True)
+    invalidate_full_data_on_commit(restaurant_ids)
+
+
+
+
+@receiver(post_save, sender=Customer)
+def customer_changed(sender, instance, created, **kwargs):
+    """A renamed customer shows up in the customer block of every restaurant they used."""
+    if created:
+        return
+
+    restaurant_ids = set(Order.objects.filter(customer=instance).values_list("restaurant_id", flat=True).distinct())
+    restaurant_ids.update(Reservation.objects.filter(customer=instance).values_list("table__restaurant_id", flat=True).distinct())
+    restaurant_ids.update(CustomerService.objects.filter(customer=instance).values_list("restaurant_id", flat=True).distinct())
+    invalidate_full_data_on_commit(restaurant_ids)
@@ -0,0 +1,312 @@
+from django.core.cache import cache
+from django.utils.timezone import now
+from django.db.models import Count, Max
+from table.models import Table, Reservation
+from restaurants.models import OpenAndCloseTime
+from items.models import Item
+from order.models import Order
+from customerService.models import CustomerService
+from AIvapi.usage import aget_used_seconds
+from subscription.models import Subscription
+from delivery_management.models import AreaManagement
+from extras.models import Extra
+from customer.models import Customer
+
+
+# Snapshots are invalidated explicitly on write (see accounts.signals), the
+# timeout only bounds how long an orphaned entry can live in the cache.
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+# Number of recent orders / reservations / services returned for a caller
+CALLER_RECENT_LIMIT = 5
+
+
+
+def _snapshot_key(restaurant_id):
+    return f"restaurant_full_data:{restaurant_id}"
+
+
+def _version_key(restaurant_id):
+    return f"restaurant_full_data_version:{restaurant_id}"
+
+
+
+
+def invalidate_restaurant_full_data(restaurant_id):
+    """
+    Bump the snapshot version of a restaurant and drop the stored payload.
+    """
+    version_key = _version_key(restaurant_id)
+    cache.add(version_key, 0, timeout=None)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(version_key, 1, timeout=None)
+    cache.delete(_snapshot_key(restaurant_id))
+
+
+
+
+async def aget_restaurant_full_data(restaurant):
+    """
+    Return the call-context payload of a restaurant, served from the cache
+    when the stored snapshot matches the current version and day.
+    """
+    snapshot_key = _snapshot_key(restaurant.id)
+    version_key = _version_key(restaurant.id)
+
+    cached = await cache.aget_many([snapshot_key, version_key])
+    version = cached.get(version_key, 0)
+    snapshot = cached.get(snapshot_key)
+    today = now().date()
+
+    if snapshot and snapshot["version"] == version and snapshot["built_on"] == today:
+        return snapshot["data"]
+
+    # The version is read before building, so a write that lands while the
+    # payload is being built leaves a stale version behind and forces a rebuild.
+    data = await abuild_restaurant_full_data(restaurant)
+    await cache.aset(
+        snapshot_key,
+        {"version": version, "built_on": today, "data": data},
+        SNAPSHOT_TIMEOUT,
+    )
+    return data
+
+
+
+
+async def abuild_restaurant_full_data(restaurant):
+    """
+    Build the full restaurant payload (info, items, tables, reservations, customers ...)
+    straight from the database, with the async ORM.
+    """
+    items = [item async for item in Item.objects.filter(restaurant=restaurant)]
+    tables = [table async for table in Table.objects.filter(restaurant=restaurant)]
+    extras = [extra async for extra in Extra.objects.filter(restaurant=restaurant)]
+    today = now().date()
+    reservations = Reservation.objects.filter(table__restaurant=restaurant, date__gte=today).select_related("table")
+
+    # Group reservations by table
+    table_reservations = {}
+    async for reservation in reservations:
+        table_reservations.setdefault(reservation.table.id, []).append({
+            "id": reservation.id,
+            "guest_no": reservation.guest_no,
+            "status": reservation.status,
+            "date": reservation.date,
+            "from_time": reservation.from_time,
+            "to_time": reservation.to_time,
+            "table": reservation.table.table_name,
+        })
+
+
+    # One grouped query per activity source, merged per phone below
+    activity_sources = [
+        ("reservation", Reservation.objects.filter(table__restaurant=restaurant)),
+        ("order", Order.objects.filter(restaurant=restaurant)),
+        ("service", CustomerService.objects.filter(restaurant=restaurant)),
+    ]
+
+    customer_data = {}
+
+    for record_type, queryset in activity_sources:
+        rows = (
+            queryset.exclude(customer__phone__isnull=True)
+            .values("customer__phone", "customer__customer_name")
+            .annotate(last_created_at=Max("created_at"), total=Count("id"))
+            .order_by()
+        )
+        async for row in rows:
+            phone = row["customer__phone"]
+            entry = customer_data.setdefault(phone, {
+                "name": row["customer__customer_name"],
+                "phone": phone,
+                "most_recent_last": {"type": None, "created_at": None},
+                "total_create": 0,
+            })
+            entry["total_create"] += row["total"]
+
+            most_recent = entry["most_recent_last"]
+            if most_recent["created_at"] is None or row["last_created_at"] > most_recent["created_at"]:
+                most_recent["type"] = record_type
+                most_recent["created_at"] = row["last_created_at"]
+
+    total_duration_seconds = await aget_used_seconds(restaurant)
+
+    total_used_minutes = total_duration_seconds / 60
+
+    subscription = await Subscription.objects.filter(user_id=restaurant.owner_id, is_active=True).afirst()
+
+    areas = [area async for area in AreaManagement.objects.filter(restaurant=restaurant)]
+
+    open_close_times = [
+        {
+            "day_of_week": oc.day_of_week,
+            "opening_time": oc.opening_time,
+            "closing_time": oc.closing_time,
+        }
+        async for oc in OpenAndCloseTime.objects.filter(restaurant=restaurant)
+    ]
+
+    return {
+        "restaurant": {
+            "id": restaurant.id,
+            "name": restaurant.resturent_name,
+            "address": restaurant.address,
+            "phone_number_1": restaurant.phone_number_1,
+            "twilio_number": restaurant.twilio_number,
+            "opening_time": restaurant.opening_time,
+            "closing_time": restaurant.closing_time,
+            "website": restaurant.website,
+            "iban": restaurant.iban,
+            "tax_number": restaurant.tax_number,
+            "total_vapi_minutes" : restaurant.total_vapi_minutes,
+            "total_used_minutes_vapi": total_used_minutes,
+        },
+        "subscription": {
+            "package_name": subscription.package_name,
+            "status": subscription.status,
+            "start_date": subscription.start_date,
+            "end_date": subscription.end_date,
+            "cancel_at_period_end": subscription.cancel_at_period_end,
+            "is_active": subscription.is_active,
+        } if subscription else {},
+        "items": [
+            {
+                "id": item.id,
+                "name": item.item_name,
+                "status": item.status,
+                "description": item.descriptions,
+                "image": item.image.url if item.image else None,
+                "category": item.category,
+                "price": str(item.price),
+                "discount": str(item.discount) if item.discount else None,
+                "preparation_time": item.preparation_time,
+            }
+            for item in items
+        ],
+        "extras": [
+            {
+                "id": extra.id,
+                "extras": extra.extras,
+                "extras_price": str(extra.extras_price),
+                "update_at": extra.update_at,
+            } for extra in extras
+        ],
+        "tables": [
+            {
+                "id": table.id,
+                "name": table.table_name,
+                "status": table.status,
+                "reservation_status": table.reservation_status,
+                "total_set": table.total_set,
+                "reservations": table_reservations.get(table.id, []),  # Add reservations grouped by table
+            }
+            for table in tables
+        ],
+        "customers": list(customer_data.values()),
+        "areas": [
+            {
+                "id": area.id,
+                "postalcode": area.postalcode,
+                "estimated_delivery_time": area.estimated_delivery_time,
+                "delivery_fee": str(area.delivery_fee),
+            }
+            for area in areas
+        ],
+        "open_close_times": open_close_times
+    }
+
+
+
+
+async def aget_caller_full_data(restaurant, phone):
+    """
+    Return the call-context payload scoped to a single caller: the cached
+    restaurant snapshot without the customer list, plus the caller profile.
+    """
+    data = dict(await aget_restaurant_full_data(restaurant))
+    data.pop("customers", None)
+    data["caller"] = await abuild_caller_profile(restaurant, phone)
+    return data
+
+
+
+
+async def abuild_caller_profile(restaurant, phone):
+    """
+    Look up one caller by phone and return their recent activity at the restaurant.
+    """
+    customer = await Customer.objects.filter(phone=phone).afirst()
+    if not customer:
+        return None
+
+    orders = Order.objects.filter(restaurant=restaurant, customer=customer)
+    reservations = Reservation.objects.filter(table__restaurant=restaurant, customer=customer)
+    services = CustomerService.objects.filter(restaurant=restaurant, customer=customer)
+
+    recent_orders = [order async for order in orders.order_by("-created_at")[:CALLER_RECENT_LIMIT]]
+    recent_reservations = [
+        reservation
+        async for reservation in reservations.select_related("table").order_by("-created_at")[:CALLER_RECENT_LIMIT]
+    ]
+    recent_services = [service async for service in services.order_by("-created_at")[:CALLER_RECENT_LIMIT]]
+    total_create = await orders.acount() + await reservations.acount() + await services.acount()
+
+    latest = [
+        (records[0].created_at, record_type)
+        for record_type, records in (
+            ("reservation", recent_reservations),
+            ("order", recent_orders),
+            ("service", recent_services),
+        )
+        if records
+    ]
+    last_created_at, last_type = max(latest) if latest else (None, None)
+
+    return {
+        "name": customer.customer_name,
+        "phone": customer.phone,
+        "email": customer.email,
+        "address": customer.address,
+        "most_recent_last": {
+            "type": last_type,
+            "created_at": last_created_at,
+        },
+        "total_create": total_create,
+        "recent_orders": [
+            {
+                "id": order.id,
+                "status": order.status,
+                "order_type": order.order_type,
+                "total_price": str(order.total_price),
+                "verified": order.verified,
+                "created_at": order.created_at,
+            }
+            for order in recent_orders
+        ],
+        "recent_reservations": [
+            {
+                "id": reservation.id,
+                "guest_no": reservation.guest_no,
+                "status": reservation.status,
+                "date": reservation.date,
+                "from_time": reservation.from_time,
+                "to_time": reservation.to_time,
+                "table": reservation.table.table_name,
+            }
+            for reservation in recent_reservations
+        ],
+        "recent_services": [
+            {
+                "id": service.id,
+                "type": service.type,
+                "service_summary": service.service_summary,
+                "callback_done": service.callback_done,
+                "created_at": service.created_at,
+            }
+            for service in recent_services
+        ],
+    }
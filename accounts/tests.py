@@ -1,3 +1,64 @@
+from datetime import date, time, timedelta
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from customer.models import Customer
+from customerService.models import CustomerService
+from order.models import Order
+from restaurants.models import Restaurant
+from table.models import Table, Reservation
+from .snapshot import abuild_restaurant_full_data, aget_caller_full_data
 
 # Create your tests here.
+
+
+build_restaurant_full_data = async_to_sync(abuild_restaurant_full_data)
+get_caller_full_data = async_to_sync(aget_caller_full_data)
+
+
+
+
+class RestaurantFullDataQueriesTests(TestCase):
+    """The call-context payload runs a fixed number of queries, whatever the number of customers."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create(username="owner", email="owner@example.com")
+        self.restaurant = Restaurant.objects.create(resturent_name="Test", address="Street 1", owner=self.owner)
+        self.table = Table.objects.create(restaurant=self.restaurant, table_name="T1", total_set=4)
+
+    def add_customers(self, count):
+        first = Customer.objects.count()
+        for number in range(first, first + count):
+            customer = Customer.objects.create(customer_name=f"C{number}", phone=f"+49{number}")
+            Order.objects.create(restaurant=self.restaurant, customer=customer, total_price=10)
+            CustomerService.objects.create(restaurant=self.restaurant, customer=customer)
+            Reservation.objects.create(
+                table=self.table, customer=customer, guest_no=2,
+                date=date(2030, 1, 1) + timedelta(days=number), from_time=time(12), to_time=time(13),
+            )
+
+    def test_full_data_query_count_is_constant(self):
+        # items, tables, extras, reservations, one grouped query per activity source,
+        # usage, subscription, areas, opening hours
+        for customers, total in [(1, 1), (30, 31)]:
+            self.add_customers(customers)
+            with self.assertNumQueries(11):
+                data = build_restaurant_full_data(self.restaurant)
+            self.assertEqual(len(data["customers"]), total)
+
+        customer = next(customer for customer in data["customers"] if customer["phone"] == "+490")
+        self.assertEqual(customer["name"], "C0")
+        self.assertEqual(customer["total_create"], 3)
+        self.assertEqual(customer["most_recent_last"]["type"], "reservation")
+
+    def test_caller_query_count_is_constant(self):
+        self.add_customers(30)
+        # Caches the restaurant snapshot
+        get_caller_full_data(self.restaurant, "+490")
+
+        # customer, recent orders / reservations / services, their three counts
+        with self.assertNumQueries(7):
+            data = get_caller_full_data(self.restaurant, "+4929")
+        self.assertNotIn("customers", data)
+        self.assertEqual(data["caller"]["name"], "C29")
+        self.assertEqual(data["caller"]["total_create"], 3)
@@ -2,7 +2,7 @@ from django.urls import path
 from .views import RegisterApiView,LoginAPIView,CustomTokenRefreshView,SendOTPView,VerifyOTPView,ResetPasswordView,RestaurantFullDataAPIView
 from subscription.views import PublicPackageListView
 from customerService.views import CreateCustomerService
-from table.views import PublicReservationCreateAPIView,ReservationAutoVerifyView
+from table.views import PublicReservationCreateAPIView,ReservationAutoVerifyView,PublicTableAvailabilityAPIView
 from order.views import PublicOrderCreateAPIView,OrderAutoVerifyView
 from AIvapi.views import VapiWebhookAsyncAPIView
 
@@ -18,6 +18,7 @@ urlpatterns = [
     path('create-customer-service/', CreateCustomerService.as_view(), name='create-customer-service'),
     path("restaurants/full-data/", RestaurantFullDataAPIView.as_view(), name="restaurant-full-data"),
     path("public/reservations/create/", PublicReservationCreateAPIView.as_view(), name="public-reservation-create"),
+    path("public/reservations/availability/", PublicTableAvailabilityAPIView.as_view(), name="public-reservation-availability"),
     path("public/orders/create/", PublicOrderCreateAPIView.as_view(), name="public-order-create"),
     path("vapi-webhook/", VapiWebhookAsyncAPIView.as_view(), name="vapi-webhook"),
     path('public/order/verify/<int:pk>/', OrderAutoVerifyView.as_view(), name='order-auto-verify'),
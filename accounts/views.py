@@ -15,21 +15,13 @@ from .translations import translate_text
 from rest_framework_simplejwt.views import TokenObtainPairView,TokenRefreshView
 from django.core.mail import send_mail
 from django.conf import settings
-from table.models import Table, Reservation
+from table.models import Table
 from restaurants.models import Restaurant,OpenAndCloseTime
-from items.models import Item
-from django.utils.timezone import now
-from order.models import Order
-from customerService.models import CustomerService
-from AIvapi.models import Assistance,CallInformations
-from django.db.models import F, Sum, Func, IntegerField
-from subscription.models import Subscription
-from delivery_management.models import AreaManagement
 from datetime import time
 from customer.models import Customer
-from extras.models import Extra
 from AIvapi.delete_agent import delete_agent
-from AIvapi.models import Assistance
+from .snapshot import aget_restaurant_full_data, aget_caller_full_data
+from .async_views import AsyncAPIView, api_response
 
 
 
@@ -362,217 +354,47 @@ def clean_twilio_number(twilio_number: str) -> str:
 
 
 
-class RestaurantFullDataAPIView(APIView):
-    permission_classes = [AllowAny]
+class RestaurantFullDataAPIView(AsyncAPIView):
+    """
+    Call-context webhook for the voice agent (POST twilio_number, optional caller_phone),
+    served as a native async view.
+    """
     serializer_class = RestaurantFullDataserializer
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
-                "twilio_number": openapi.Schema(type=openapi.TYPE_STRING)
+                "twilio_number": openapi.Schema(type=openapi.TYPE_STRING),
+                "caller_phone": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="Optional. When given, only this caller's profile is returned instead of the full customer list."
+                ),
             },
             required=["twilio_number"],
         ),
-        responses={200: "Restaurant full data (info, items, tables, reservations)"},
+        responses={200: "Restaurant full data (info, items, tables, reservations, customers or caller)"},
         tags=["Webhook"]
     )
-    def post(self, request):
+    async def post(self, request):
         twilio_number = request.data.get("twilio_number")
         twilio_number = clean_twilio_number(twilio_number)
 
         if not twilio_number:
-            return Response({"error": "twilio_number is required"}, status=status.HTTP_400_BAD_REQUEST)
+            return api_response({"error": "twilio_number is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            restaurant = Restaurant.objects.get(twilio_number=twilio_number)
+            restaurant = await Restaurant.objects.select_related("owner").aget(twilio_number=twilio_number)
         except Restaurant.DoesNotExist:
-            return Response({"error": "Restaurant not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        # Get related data
-        items = Item.objects.filter(restaurant=restaurant)
-        tables = Table.objects.filter(restaurant=restaurant)
-        extras = Extra.objects.filter(restaurant=restaurant) 
-        today = now().date()
-        reservations = Reservation.objects.filter(table__restaurant=restaurant, date__gte=today)
-
-        # Group reservations by table
-        table_reservations = {}
-        for reservation in reservations:
-            table_reservations.setdefault(reservation.table.id, []).append({
-                "id": reservation.id,
-                "guest_no": reservation.guest_no,
-                "status": reservation.status,
-                "date": reservation.date,
-                "from_time": reservation.from_time,
-                "to_time": reservation.to_time,
-                "table": reservation.table.table_name,
-            })
-
-
-        # Collect distinct phone numbers
-        phones = set(
-            list(
-                Reservation.objects.filter(table__restaurant=restaurant)
-                .exclude(customer__phone__isnull=True)
-                .values_list("customer__phone", flat=True)
-            )
-            + list(
-                Order.objects.filter(restaurant=restaurant)
-                .exclude(customer__phone__isnull=True)
-                .values_list("customer__phone", flat=True)
-            )
-            + list(
-                CustomerService.objects.filter(restaurant=restaurant)
-                .exclude(customer__phone__isnull=True)
-                .values_list("customer__phone", flat=True)
-            )
-        )
-
-        customer_data = {}
-
-        for phone in phones:
-            # Get the latest record from Reservation, Order, CustomerService
-            last_res = Reservation.objects.filter(table__restaurant=restaurant, customer__phone=phone).order_by("-created_at").first()
-            res_count = Reservation.objects.filter(table__restaurant=restaurant, customer__phone=phone).count()
-
-            last_order = Order.objects.filter(restaurant=restaurant, customer__phone=phone).order_by("-created_at").first()
-            order_count = Order.objects.filter(restaurant=restaurant, customer__phone=phone).count()
-
-            last_service = CustomerService.objects.filter(restaurant=restaurant, customer__phone=phone).order_by("-created_at").first()
-            service_count = CustomerService.objects.filter(restaurant=restaurant, customer__phone=phone).count()
-
-            # Determine latest record
-            records = [r for r in [last_res, last_order, last_service] if r is not None]
-            latest_record = max(records, key=lambda x: x.created_at) if records else None
-
-            if latest_record:
-                if isinstance(latest_record, Reservation):
-                    last_type = "reservation"
-                    name = latest_record.customer.customer_name if latest_record.customer else None
-                elif isinstance(latest_record, Order):
-                    last_type = "order"
-                    name = latest_record.customer.customer_name if latest_record.customer else None
-                elif isinstance(latest_record, CustomerService):
-                    last_type = "service"
-                    name = latest_record.customer.customer_name if latest_record.customer else None
-                else:
-                    last_type, name = None, None
-            else:
-                last_type, name = None, None
-
-            customer_data[phone] = {
-                "name": name,
-                "phone": phone,
-                "most_recent_last": {
-                    "type": last_type,
-                    "created_at": latest_record.created_at if latest_record else None,
-                },
-                "total_create": res_count + order_count + service_count,
-            }
+            return api_response({"error": "Restaurant not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Ensure the duration is a valid integer by rounding or converting it
-        # Use correct SQL syntax for CAST and ensure duration is handled as a float before casting to integer
-        total_call_duration = CallInformations.objects.filter(
-            assistant_id__in=Assistance.objects.filter(restaurant=restaurant).values_list('assistant_id', flat=True)
-        ).aggregate(
-            total_duration=Sum(Func(F('duration_seconds'), function='CAST', template='CAST(CAST(%(expressions)s AS FLOAT) AS INTEGER)', output_field=IntegerField()))
-        )
-
-
-
-        total_duration_seconds = total_call_duration['total_duration'] if total_call_duration['total_duration'] else 0
-
-        total_used_minutes = total_duration_seconds / 60
-
-        try:
-            subscription = Subscription.objects.filter(user=restaurant.owner, is_active=True).first()
-        except Subscription.DoesNotExist:
-            subscription = None
-
-        areas = AreaManagement.objects.filter(restaurant=restaurant)
-
-        open_close_times_qs = OpenAndCloseTime.objects.filter(restaurant=restaurant)
-        open_close_times = [
-            {
-                "day_of_week": oc.day_of_week,
-                "opening_time": oc.opening_time,
-                "closing_time": oc.closing_time,
-            }
-            for oc in open_close_times_qs
-        ] if open_close_times_qs.exists() else []
-
-        # Prepare response
-        data = {
-            "restaurant": {
-                "id": restaurant.id,
-                "name": restaurant.resturent_name,
-                "address": restaurant.address,
-                "phone_number_1": restaurant.phone_number_1,
-                "twilio_number": restaurant.twilio_number,
-                "opening_time": restaurant.opening_time,
-                "closing_time": restaurant.closing_time,
-                "website": restaurant.website,
-                "iban": restaurant.iban,
-                "tax_number": restaurant.tax_number,
-                "total_vapi_minutes" : restaurant.total_vapi_minutes,
-                "total_used_minutes_vapi": total_used_minutes,
-            },
-            "subscription": {
-                "package_name": subscription.package_name if subscription else None,
-                "status": subscription.status if subscription else None,
-                "start_date": subscription.start_date if subscription else None,
-                "end_date": subscription.end_date if subscription else None,
-                "cancel_at_period_end": subscription.cancel_at_period_end if subscription else None,
-                "is_active": subscription.is_active if subscription else None,
-            } if subscription else {},
-            "items": [
-                {
-                    "id": item.id,
-                    "name": item.item_name,
-                    "status": item.status,
-                    "description": item.descriptions,
-                    "image": item.image.url if item.image else None,
-                    "category": item.category,
-                    "price": str(item.price),
-                    "discount": str(item.discount) if item.discount else None,
-                    "preparation_time": item.preparation_time,
-                }
-                for item in items
-            ],
-            "extras": [
-                {
-                    "id": extra.id,
-                    "extras": extra.extras,
-                    "extras_price": str(extra.extras_price),
-                    "update_at": extra.update_at,
-                } for extra in extras
-            ],
-            "tables": [
-                {
-                    "id": table.id,
-                    "name": table.table_name,
-                    "status": table.status,
-                    "reservation_status": table.reservation_status,
-                    "total_set": table.total_set,
-                    "reservations": table_reservations.get(table.id, []),  # Add reservations grouped by table
-                }
-                for table in tables
-            ],
-            "customers": list(customer_data.values()),
-            "areas": [
-                {
-                    "id": area.id,
-                    "postalcode": area.postalcode,
-                    "estimated_delivery_time": area.estimated_delivery_time,
-                    "delivery_fee": str(area.delivery_fee),
-                }
-                for area in areas
-            ],
-            "open_close_times": open_close_times
-        }
+        caller_phone = clean_twilio_number(request.data.get("caller_phone"))
+        if caller_phone:
+            data = await aget_caller_full_data(restaurant, caller_phone)
+        else:
+            data = await aget_restaurant_full_data(restaurant)
 
-        return Response(data, status=status.HTTP_200_OK)
+        return api_response(data, status=status.HTTP_200_OK)
     
 
 
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -72,9 +73,12 @@ INSTALLED_APPS = [
     'delivery_management',
     'customer',
     'extras',
+    'notifications',
 ]
 
 MIDDLEWARE = [
+    'AIvapi.middleware.VapiWebhookFastPathMiddleware',
+    'Channel.middleware.ChannelEventsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -109,9 +113,23 @@ ASGI_APPLICATION = 'airestaurant.asgi.application'
 WSGI_APPLICATION = 'airestaurant.wsgi.application'
 
 
+# Shared through Redis so Celery workers can push websocket events too
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {
+            "hosts": [os.getenv("REDIS_CHANNEL_URL", "redis://redis:6379/2")],
+        },
+    }
+}
+
+
+# Cache (call-context snapshots, see accounts/snapshot.py)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_CACHE_URL", "redis://redis:6379/1"),
     }
 }
 
@@ -257,6 +275,13 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 VAPI_API = os.getenv("VAPI_API")
 
+# Archive of raw Vapi webhook payloads (see AIvapi/archive.py)
+VAPI_ARCHIVE_PATH = os.getenv("VAPI_ARCHIVE_PATH", os.path.join(BASE_DIR, "logs", "vapi_webhooks.jsonl"))
+VAPI_ARCHIVE_MAX_BYTES = int(os.getenv("VAPI_ARCHIVE_MAX_BYTES", 50 * 1024 * 1024))
+VAPI_ARCHIVE_BACKUP_COUNT = int(os.getenv("VAPI_ARCHIVE_BACKUP_COUNT", 10))
+VAPI_ARCHIVE_COMPRESS = os.getenv("VAPI_ARCHIVE_COMPRESS", "true").lower() == "true"
+VAPI_ARCHIVE_SAMPLE_RATE = float(os.getenv("VAPI_ARCHIVE_SAMPLE_RATE", 1.0))
+
 
 DATABASES = {
     'default': {
@@ -279,3 +304,25 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = "Europe/Berlin"
 
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for outbox emails whose on-commit wake-up was lost or failed
+    "drain-email-outbox": {
+        "task": "notifications.tasks.drain_email_outbox",
+        "schedule": 60.0,
+    },
+    # Recompute the recent dashboard rollups, for writes that bypassed the signals
+    "repair-daily-stats": {
+        "task": "owner.tasks.repair_daily_stats",
+        "schedule": 60.0 * 60,
+    },
+    # Keep Table.reservation_status current for the admin and the call-context snapshots
+    "refresh-table-reservation-statuses": {
+        "task": "table.tasks.refresh_table_reservation_statuses",
+        "schedule": 60.0,
+    },
+    # Reservation reminder emails, REMINDER_LEAD before the start
+    "send-reservation-reminders": {
+        "task": "table.tasks.send_reservation_reminders",
+        "schedule": 60.0,
+    },
+}
@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from customer.models import Customer
+from customer.signals import refresh_customer_state, refresh_completed_verified_order, refresh_open_reservation_count
+from order.constants import STATUS_CHOICES
+from order.models import Order
+from restaurants.models import Restaurant
+from table.constants import RESERVATION_STATUS
+from table.models import Table, Reservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the 'previous verified order' / 'unfinished reservation' checks against the "
+        "customer state fields on generated data. Everything runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=100000)
+        parser.add_argument("--orders", type=int, default=1000000)
+        parser.add_argument("--reservations", type=int, default=1000000)
+        parser.add_argument("--lookups", type=int, default=200, help="Timed lookups per check.")
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+        self.stdout.write("Rolled back the generated data.")
+
+    def run(self, options):
+        rng = random.Random(42)
+        batch_size = options["batch_size"]
+
+        started = time.perf_counter()
+        owner = get_user_model().objects.create(username="benchmark", email="benchmark@example.invalid")
+        restaurant = Restaurant.objects.create(resturent_name="Benchmark", address="-", owner=owner)
+        table = Table.objects.create(restaurant=restaurant, table_name="B1", total_set=4)
+
+        Customer.objects.bulk_create(
+            [Customer(customer_name=f"Customer {i}", phone=f"+bench{i}") for i in range(options["customers"])],
+            batch_size=batch_size,
+        )
+        customer_ids = list(Customer.objects.filter(phone__startswith="+bench").values_list("id", flat=True))
+
+        order_statuses = [value for value, _ in STATUS_CHOICES]
+        for offset in range(0, options["orders"], batch_size):
+            Order.objects.bulk_create([
+                Order(
+                    restaurant=restaurant,
+                    customer_id=rng.choice(customer_ids),
+                    status=rng.choice(order_statuses),
+                    verified=rng.random() < 0.5,
+                    total_price=10,
+                )
+                for _ in range(min(batch_size, options["orders"] - offset))
+            ])
+
+        reservation_statuses = [value for value, _ in RESERVATION_STATUS]
+        for offset in range(0, options["reservations"], batch_size):
+            Reservation.objects.bulk_create([
+                Reservation(
+                    table=table,
+                    customer_id=rng.choice(customer_ids),
+                    status=rng.choice(reservation_statuses),
+                    guest_no=2,
+                    date="2030-01-01",
+                    from_time="12:00",
+                    to_time="13:00",
+                )
+                for _ in range(min(batch_size, options["reservations"] - offset))
+            ])
+
+        refresh_customer_state(Customer.objects.filter(id__in=customer_ids))
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (Customer, Order, Reservation):
+                    cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+        self.stdout.write(f"Generated {len(customer_ids)} customers, {options['orders']} orders and "
+                          f"{options['reservations']} reservations in {time.perf_counter() - started:.1f}s")
+
+        sample = [rng.choice(customer_ids) for _ in range(options["lookups"])]
+        phones = dict(Customer.objects.filter(id__in=sample).values_list("id", "phone"))
+
+        checks = {
+            "verified order, join on phone (old)": lambda cid: Order.objects.filter(
+                customer__phone=phones[cid], verified=True, status="completed"
+            ).exists(),
+            "unfinished reservation, join on phone (old)": lambda cid: Reservation.objects.filter(
+                customer__phone=phones[cid]
+            ).exclude(status="finished").exists(),
+            "customer state fields (new read)": lambda cid: Customer.objects.filter(phone=phones[cid]).values_list(
+                "has_completed_verified_order", "open_reservation_count"
+            ).first(),
+            "refresh verified flag (new write)": refresh_completed_verified_order,
+            "refresh open reservations (new write)": refresh_open_reservation_count,
+        }
+
+        for name, check in checks.items():
+            timings = []
+            for customer_id in sample:
+                started = time.perf_counter()
+                check(customer_id)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+            self.stdout.write(f"  {name:<45} avg {statistics.mean(timings):7.3f}ms  p95 {p95:7.3f}ms")
+        self.stdout.write("The create paths read the state fields from the customer row they already "
+                          "loaded, so the new read costs no extra query there.")
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:48
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_customer_state(apps, schema_editor):
+    Customer = apps.get_model('customer', 'Customer')
+    Order = apps.get_model('order', 'Order')
+    Reservation = apps.get_model('table', 'Reservation')
+
+    open_reservations = (
+        Reservation.objects.filter(customer_id=OuterRef('pk'))
+        .exclude(status='finished')
+        .order_by()
+        .values('customer_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Customer.objects.update(
+        has_completed_verified_order=Exists(
+            Order.objects.filter(customer_id=OuterRef('pk'), verified=True, status='completed')
+        ),
+        open_reservation_count=Coalesce(Subquery(open_reservations, output_field=IntegerField()), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0003_alter_customer_email'),
+        ('order', '0009_order_order_customer_verified_idx'),
+        ('table', '0008_reservation_reservation_customer_open_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='has_completed_verified_order',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='open_reservation_count',
+            field=models.PositiveIntegerField(default=0, help_text='Reservations not finished yet'),
+        ),
+        migrations.RunPython(fill_customer_state, migrations.RunPython.noop),
+    ]
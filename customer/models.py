@@ -9,6 +9,10 @@ class Customer(models.Model):
     phone = models.CharField(unique=True,max_length=20,blank=True, null=True)
     address = models.TextField(blank=True, null=True)
 
+    # Maintained by customer.signals, read by the order / reservation create checks
+    has_completed_verified_order = models.BooleanField(default=False)
+    open_reservation_count = models.PositiveIntegerField(default=0, help_text="Reservations not finished yet")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
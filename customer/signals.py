@@ -0,0 +1,95 @@
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from order.models import Order
+from table.models import Reservation
+from .models import Customer
+
+
+
+def refresh_completed_verified_order(customer_id):
+    """Recompute Customer.has_completed_verified_order in one UPDATE."""
+    if not customer_id:
+        return
+    Customer.objects.filter(id=customer_id).update(
+        has_completed_verified_order=Exists(
+            Order.objects.filter(customer_id=customer_id, verified=True, status="completed")
+        )
+    )
+
+
+def refresh_open_reservation_count(customer_id):
+    """Recompute Customer.open_reservation_count in one UPDATE."""
+    if not customer_id:
+        return
+    open_reservations = (
+        Reservation.objects.filter(customer_id=customer_id)
+        .exclude(status="finished")
+        .order_by()
+        .values("customer_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Customer.objects.filter(id=customer_id).update(
+        open_reservation_count=Coalesce(Subquery(open_reservations, output_field=IntegerField()), 0)
+    )
+
+
+
+
+def refresh_customer_state(customers):
+    """Recompute both state fields for a queryset of customers, e.g. after bulk imports."""
+    open_reservations = (
+        Reservation.objects.filter(customer_id=OuterRef("pk"))
+        .exclude(status="finished")
+        .order_by()
+        .values("customer_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return customers.update(
+        has_completed_verified_order=Exists(
+            Order.objects.filter(customer_id=OuterRef("pk"), verified=True, status="completed")
+        ),
+        open_reservation_count=Coalesce(Subquery(open_reservations, output_field=IntegerField()), 0),
+    )
+
+
+
+
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=Reservation)
+def remember_previous_customer(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the customer the row belongs to in the database on the instance, so
+    the post_save refresh also covers the customer it is moved away from.
+    """
+    instance._previous_customer_id = None
+    if instance._state.adding or (update_fields is not None and not {"customer", "customer_id"} & update_fields):
+        return
+    instance._previous_customer_id = (
+        sender.objects.filter(pk=instance.pk).values_list("customer_id", flat=True).first()
+    )
+
+
+def affected_customer_ids(instance):
+    return {instance.customer_id, getattr(instance, "_previous_customer_id", None)}
+
+
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def order_changed(sender, instance, **kwargs):
+    for customer_id in affected_customer_ids(instance):
+        refresh_completed_verified_order(customer_id)
+
+
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def reservation_changed(sender, instance, **kwargs):
+    for customer_id in affected_customer_ids(instance):
+        refresh_open_reservation_count(customer_id)
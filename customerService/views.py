@@ -1,6 +1,5 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
 from rest_framework import status
 from .serializers import CustomerServiceSerializer
 from drf_yasg.utils import swagger_auto_schema
@@ -15,12 +14,14 @@ from datetime import datetime,timedelta
 import pytz
 from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from Channel.events import publish
+from accounts.async_views import AsyncAPIView, api_response, run_in_thread_pool
 
 # Create your views here.
-class CreateCustomerService(APIView):
-    permission_classes = [AllowAny] 
+class CreateCustomerService(AsyncAPIView):
+    """
+    Create a new Customer Service record (public webhook, native async view).
+    """
 
     @swagger_auto_schema(
         operation_description="Create a new Customer Service record.",
@@ -31,29 +32,30 @@ class CreateCustomerService(APIView):
         },
         tags=['Webhook']
     )
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         data = request.data
         restaurant_id = data.get('restaurant')
         if restaurant_id:
             try:
-                restaurant = Restaurant.objects.get(id= restaurant_id)
-            except Restaurant.DoesNotExist:
-                return Response({'error' : "Restaurant not found"},status=status.HTTP_404_NOT_FOUND)
+                restaurant = await Restaurant.objects.aget(id= restaurant_id)
+            except (Restaurant.DoesNotExist, ValueError):
+                return api_response({'error' : "Restaurant not found"},status=status.HTTP_404_NOT_FOUND)
         else:
-            return Response({'error': 'Restaurant ID is required'}, status=status.HTTP_400_BAD_REQUEST)   
+            return api_response({'error': 'Restaurant ID is required'}, status=status.HTTP_400_BAD_REQUEST)   
+
+        service_data, errors = await run_in_thread_pool(self.create_service)(data, restaurant)
+        if errors:
+            return api_response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return api_response(service_data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def create_service(data, restaurant):
         serializer = CustomerServiceSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save(restaurant=restaurant)
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant.id}",
-                {
-                    "type": "customer_service_created",
-                    "service": serializer.data
-                }
-            )
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        serializer.save(restaurant=restaurant)
+        publish(restaurant.id, "customer_service_created", "service", serializer.data)
+        return serializer.data, None
 
 
 
@@ -16,8 +16,7 @@ import shutil
 import tempfile
 import json
 import traceback
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from Channel.events import publish
 
 
 
@@ -92,14 +91,7 @@ class ItemCreateAPIView(APIView):
             #     data['item_name'] = translate_text(data['item_name'] , lean)
             #     data['descriptions'] = translate_text(data['descriptions'], lean)
             #     data['category'] = translate_text(data['category'], lean)
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant.id}",
-                {
-                    "type": "item_created",
-                    "item": data,
-                }
-            )
+            publish(restaurant.id, "item_created", "item", data)
             return Response(data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -308,14 +300,7 @@ class ItemUpdateAPIView(APIView):
             serializer.save()
             data = serializer.data
 
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant.id}",
-                {
-                    "type": "item_updated",
-                    "item": data,
-                }
-            )
+            publish(restaurant.id, "item_updated", "item", data)
 
             # if lean != 'EN':
             #     data['item_name'] = translate_text(data['item_name'] , lean)
@@ -363,15 +348,9 @@ class ItemDeleteAPIView(APIView):
             )
 
         # Delete item
+        item_id = item.id
         item.delete()
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f"restaurant_{restaurant.id}",
-            {
-                "type": "item_deleted",
-                "item_id": item,
-            }
-        )
+        publish(restaurant.id, "item_deleted", "item_id", item_id)
         return Response({"message": "Item deleted successfully."}, status=status.HTTP_200_OK)
 
 
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import OutboxEmail
+# Register your models here.
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "recipients", "status", "attempts", "available_at", "sent_at", "created_at")
+    search_fields = ("subject", "last_error")
+    list_filter = ("status", "created_at")
+    ordering = ("-created_at",)
@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+from .constants import OUTBOX_STATUS_CHOICES
+
+# Create your models here.
+
+
+class OutboxEmail(models.Model):
+    """
+    Email written in the same transaction as the order / reservation that
+    triggers it and delivered later by notifications.tasks.drain_email_outbox.
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(null=True, blank=True)
+    from_email = models.CharField(max_length=255, null=True, blank=True)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=OUTBOX_STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not sent before this time (retry backoff)")
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
@@ -0,0 +1,53 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from .models import OutboxEmail
+from .tasks import drain_email_outbox
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+def _wake_drain():
+    # The periodic drain picks the email up anyway if the broker is unreachable
+    try:
+        drain_email_outbox.delay()
+    except Exception as e:
+        logger.warning("Could not queue outbox drain: %s", e)
+
+
+def enqueue_email(subject, message, recipients, html_message=None, from_email=None):
+    """
+    Drop-in replacement for send_mail(): stores the email in the outbox as part of
+    the current transaction and wakes the drain task once it commits.
+    """
+    email = OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+    transaction.on_commit(_wake_drain)
+    return email
+
+
+def enqueue_emails(emails, from_email=None):
+    """
+    Bulk version of enqueue_email(): `emails` are (subject, message, recipients)
+    tuples, stored with one INSERT and a single drain wake-up.
+    """
+    outbox = OutboxEmail.objects.bulk_create([
+        OutboxEmail(
+            subject=subject,
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipients),
+        )
+        for subject, message, recipients in emails
+    ])
+    if outbox:
+        transaction.on_commit(_wake_drain)
+    return outbox
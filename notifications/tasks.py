@@ -0,0 +1,115 @@
+from datetime import timedelta
+from celery import shared_task
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEmail
+
+
+BATCH_SIZE = 50
+MAX_BATCHES_PER_RUN = 20
+MAX_ATTEMPTS = 5
+
+# A claimed email not stamped within this time (worker crash ...) is claimed again
+SENDING_LEASE = timedelta(minutes=10)
+
+
+
+
+def _retry_delay(attempts):
+    """1, 2, 4, 8 ... minutes between attempts."""
+    return timedelta(minutes=2 ** (attempts - 1))
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def _claim_batch():
+    """
+    Claim one batch of due emails in a short transaction: they are set to
+    'sending' with a lease in available_at, so no other worker picks them up
+    while they are sent outside of any transaction. Emails whose lease ran
+    out are claimed again, or failed once they have used up their attempts.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], available_at__lte=now)
+            .order_by('available_at', 'id')[:BATCH_SIZE]
+        )
+
+        claimed = []
+        for email in batch:
+            email.updated_at = now
+            if email.status == 'sending' and email.attempts >= MAX_ATTEMPTS:
+                email.status = 'failed'
+                email.last_error = "Sending was interrupted before the result was stored"
+                continue
+            email.status = 'sending'
+            email.attempts += 1
+            email.available_at = now + SENDING_LEASE
+            claimed.append(email)
+
+        OutboxEmail.objects.bulk_update(batch, ['status', 'attempts', 'last_error', 'available_at', 'updated_at'])
+    return claimed
+
+
+def _send_batch(connection):
+    """
+    Claim and send one batch of due emails over an already open connection,
+    stamping each result as soon as it is known. Returns the number of emails
+    picked up.
+    """
+    batch = _claim_batch()
+    for email in batch:
+        try:
+            _build_message(email, connection).send()
+        except Exception as e:
+            failed = email.attempts >= MAX_ATTEMPTS
+            OutboxEmail.objects.filter(id=email.id, status='sending').update(
+                status='failed' if failed else 'pending',
+                available_at=timezone.now() + _retry_delay(email.attempts),
+                last_error=str(e),
+                updated_at=timezone.now(),
+            )
+        else:
+            OutboxEmail.objects.filter(id=email.id, status='sending').update(
+                status='sent',
+                sent_at=timezone.now(),
+                last_error=None,
+                updated_at=timezone.now(),
+            )
+    return len(batch)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def drain_email_outbox(self):
+    """Send pending outbox emails in batches, reusing one SMTP connection"""
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # SMTP server unreachable, the emails stay pending
+        raise self.retry(exc=exc)
+
+    sent = 0
+    try:
+        for _ in range(MAX_BATCHES_PER_RUN):
+            picked = _send_batch(connection)
+            sent += picked
+            if picked < BATCH_SIZE:
+                break
+    finally:
+        connection.close()
+    return f"Processed {sent} outbox emails"
@@ -1,5 +1,4 @@
-from django.core.mail import send_mail
-from django.conf import settings
+from notifications.outbox import enqueue_email
 from django.utils.html import format_html, format_html_join
 from decimal import Decimal
 from django.template.loader import render_to_string
@@ -168,10 +167,9 @@ def send_order_confirmation_email(order):
         customer.address or "N/A"
     )
 
-    send_mail(
+    enqueue_email(
         subject,
         message,
-        settings.DEFAULT_FROM_EMAIL,
         [customer.email],
         html_message=message
     )
@@ -398,16 +396,11 @@ def send_order_verified_email(order):
     </html>
     """
 
-    try:
-        send_mail(
-            subject,
-            message.strip(),
-            settings.DEFAULT_FROM_EMAIL,
-            [customer.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        print(f"✅ Verification email sent to {customer.email}")
-    except Exception as e:
-        print(f"❌ Failed to send verification email: {e}")
+    enqueue_email(
+        subject,
+        message.strip(),
+        [customer.email],
+        html_message=html_message,
+    )
+    print(f"✅ Verification email queued for {customer.email}")
 
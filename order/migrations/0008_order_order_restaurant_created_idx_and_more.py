@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0003_alter_customer_email'),
+        ('delivery_management', '0001_initial'),
+        ('order', '0007_alter_order_status'),
+        ('restaurants', '0010_openandclosetime_is_closed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', '-created_at', '-id'], name='order_restaurant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'updated_at'], name='order_restaurant_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery_management', '0001_initial'),
+        ('order', '0008_order_order_restaurant_created_idx_and_more'),
+        ('restaurants', '0010_openandclosetime_is_closed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'completed'), ('verified', True)), fields=['customer'], name='order_customer_verified_idx'),
+        ),
+    ]
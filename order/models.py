@@ -24,6 +24,19 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the dashboard order list and its since= sync
+            models.Index(fields=['restaurant', '-created_at', '-id'], name='order_restaurant_created_idx'),
+            models.Index(fields=['restaurant', 'updated_at'], name='order_restaurant_updated_idx'),
+            # Backs customer.signals.refresh_completed_verified_order
+            models.Index(
+                fields=['customer'],
+                condition=models.Q(verified=True, status='completed'),
+                name='order_customer_verified_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.customer.customer_name if self.customer else f"Order {self.id}"
     
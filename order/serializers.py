@@ -5,12 +5,42 @@ from django.db.models import Sum, Count, Min, Max
 from .emails import send_order_confirmation_email,send_order_verified_email
 from table.signals import send_twilio_sms_via_assistance
 from customer.models import Customer
+from django.db import transaction
+
+
+
+
+def calculate_line_price(item, quantity, extras_price):
+    """Line total: item price x quantity, minus the item discount (%), plus extras."""
+    total_item_price = float(item.price) * quantity
+    if item.discount:
+        total_item_price -= (float(item.discount) / 100) * total_item_price
+    return total_item_price + float(extras_price or 0)
+
+
+def build_item_json(item):
+    """Snapshot of the item stored on the order line."""
+    return {
+        "id": item.id,
+        "name": item.item_name,
+        "price": float(item.price),
+        "discount": float(item.discount) if item.discount else None,
+        "description": getattr(item, "description", None),
+        "item_name": item.item_name,
+        "status": item.status,
+        "descriptions": item.descriptions,
+        "image": item.image.url if item.image else None,
+        "category": item.category,
+        "preparation_time": str(item.preparation_time) if item.preparation_time else None,
+        "restaurant_id": item.restaurant_id,
+    }
 
 
 
 
 class OrderItemCreateSerializer(serializers.ModelSerializer):
-    item = serializers.PrimaryKeyRelatedField(queryset=Item.objects.all())
+    # Plain id, items are resolved in one query by the order serializer
+    item = serializers.IntegerField()
     price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     item_json = serializers.JSONField(read_only=True)
 
@@ -22,32 +52,12 @@ class OrderItemCreateSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
+        # "item" has been resolved to an Item by OrderCreateSerializer.validate
         item = validated_data["item"]
-        quantity = validated_data.get("quantity", 1)
-        extras_price = validated_data.get("extras_price") or 0
-
-        # Calculate total item price
-        total_price = float(item.price) * quantity
-        if item.discount:
-            total_price -= (float(item.discount) / 100) * total_price
-        total_price += float(extras_price)
-
-
-        # Save snapshot of item details
-        validated_data["item_json"] = {
-            "id": item.id,
-            "item_name": item.item_name,
-            "status": item.status,
-            "descriptions": item.descriptions,
-            "image": item.image.url if item.image else None,
-            "category": item.category,
-            "price": float(item.price),
-            "discount": float(item.discount) if item.discount else None,
-            "preparation_time": str(item.preparation_time) if item.preparation_time else None,
-            "restaurant_id": item.restaurant.id,
-        }
-
-        validated_data["price"] = total_price
+        validated_data["item_json"] = build_item_json(item)
+        validated_data["price"] = calculate_line_price(
+            item, validated_data.get("quantity", 1), validated_data.get("extras_price")
+        )
         return OrderItem(**validated_data)
 
 
@@ -74,6 +84,27 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ("total_price", "delivery_area_json", "created_at", "updated_at")
 
 
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        order_items_data = attrs.get("order_items", [])
+        restaurant = attrs.get("restaurant")
+
+        # Resolve every referenced item in a single query
+        items = Item.objects.in_bulk({line["item"] for line in order_items_data})
+
+        missing = sorted({line["item"] for line in order_items_data} - set(items))
+        if missing:
+            raise serializers.ValidationError({"order_items": f"Invalid item id(s): {', '.join(map(str, missing))}"})
+
+        foreign = sorted(item.id for item in items.values() if restaurant and item.restaurant_id != restaurant.id)
+        if foreign:
+            raise serializers.ValidationError({"order_items": f"Item(s) {', '.join(map(str, foreign))} do not belong to this restaurant."})
+
+        for line in order_items_data:
+            line["item"] = items[line["item"]]
+        return attrs
+
+
     def create(self, validated_data):
         order_items_data = validated_data.pop("order_items", [])
 
@@ -83,104 +114,75 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         email = validated_data.pop('email', None)
         address = validated_data.pop('address', None)
 
-        if phone_number:
-            customer, created = Customer.objects.get_or_create(phone=phone_number)
-            customer.customer_name = customer_name or customer.customer_name
-            customer.email = email or customer.email
-            customer.address = address or customer.address
-            customer.save()
-            validated_data["customer"] = customer
-        else:
-            validated_data["customer"] = None
-
-
-        delivery_area = validated_data.get("delivery_area")
-
-        if delivery_area:
-            validated_data["delivery_area_json"] = {
-                "id": delivery_area.id,
-                "postalcode": delivery_area.postalcode,
-                "estimated_delivery_time": delivery_area.estimated_delivery_time,
-                "delivery_fee": float(delivery_area.delivery_fee or 0),
-                "restaurant_id": delivery_area.restaurant.id,
-            }
-
-
-        order = Order.objects.create(total_price=0, **validated_data)
-
-        total_price = 0
-
-        for item_data in order_items_data:
-            if isinstance(item_data.get("item"), Item):
-                item_data["item"] = item_data["item"].id
-
-            item = Item.objects.get(id=item_data["item"])
-            quantity = item_data.get("quantity", 1)
-            extras_price = float(item_data.get("extras_price") or 0)
-
-            # ✅ Calculate price correctly
-            item_base_price = float(item.price)
-            total_item_price = item_base_price * quantity
-
-            if item.discount:
-                total_item_price -= (float(item.discount) / 100) * total_item_price
-
-            total_item_price += extras_price
-
-            # Save item_json
-            item_json = {
-                "id": item.id,
-                "name": item.item_name,
-                "price": float(item.price),
-                "discount": float(item.discount) if item.discount else None,
-                "description": getattr(item, "description", None),
-                "item_name": item.item_name,
-                "status": item.status,
-                "image": item.image.url if item.image else None,
-                "category": item.category,
-                "preparation_time": str(item.preparation_time) if item.preparation_time else None,
-                "restaurant_id": item.restaurant.id,
-            }
-
-            # ✅ Create OrderItem with price set
-            order_item = OrderItem.objects.create(
-                order=order,
-                item=item,
-                quantity=quantity,
-                price=total_item_price,
-                extras=item_data.get("extras"),
-                extras_price=extras_price,
-                special_instructions=item_data.get("special_instructions"),
-                item_json=item_json,
-            )
-
-            total_price += total_item_price
-
-        # Add delivery fee if applicable
-        if order.order_type == "delivery" and delivery_area:
-            # print('💵💵💵💵 Adding delivery fee:', delivery_area.delivery_fee)
-            total_price += float(delivery_area.delivery_fee or 0)
-
-        # Save total price
-        order.total_price = total_price
-        order.save()
-
-        phone = order.customer.phone if order.customer else None
-        has_previous_verified = False
-
-        if phone:
-            has_previous_verified = Order.objects.filter(
-                customer__phone=phone,
-                verified=True,
-                status ="completed",
-            ).exists()
-        
-        if not has_previous_verified:
-            order.verified = False
-            order.save()
-            send_order_verified_email(order)
-        else:
-            send_order_confirmation_email(order)
+        with transaction.atomic():
+            if phone_number:
+                customer, created = Customer.objects.get_or_create(phone=phone_number)
+                customer.customer_name = customer_name or customer.customer_name
+                customer.email = email or customer.email
+                customer.address = address or customer.address
+                customer.save()
+                validated_data["customer"] = customer
+            else:
+                validated_data["customer"] = None
+
+
+            delivery_area = validated_data.get("delivery_area")
+
+            if delivery_area:
+                validated_data["delivery_area_json"] = {
+                    "id": delivery_area.id,
+                    "postalcode": delivery_area.postalcode,
+                    "estimated_delivery_time": delivery_area.estimated_delivery_time,
+                    "delivery_fee": float(delivery_area.delivery_fee or 0),
+                    "restaurant_id": delivery_area.restaurant_id,
+                }
+
+
+            # Build the lines in memory, the order is written once with its total
+            order_items = []
+            total_price = 0
+
+            for item_data in order_items_data:
+                item = item_data["item"]
+                quantity = item_data.get("quantity", 1)
+                extras_price = float(item_data.get("extras_price") or 0)
+                total_item_price = calculate_line_price(item, quantity, extras_price)
+
+                order_items.append(OrderItem(
+                    item=item,
+                    quantity=quantity,
+                    price=total_item_price,
+                    extras=item_data.get("extras"),
+                    extras_price=extras_price,
+                    special_instructions=item_data.get("special_instructions"),
+                    item_json=build_item_json(item),
+                ))
+
+                total_price += total_item_price
+
+            # Add delivery fee if applicable
+            if validated_data.get("order_type", "delivery") == "delivery" and delivery_area:
+                total_price += float(delivery_area.delivery_fee or 0)
+
+
+            # Maintained by customer.signals, no lookup over the order history
+            customer = validated_data["customer"]
+            has_previous_verified = bool(customer and customer.phone and customer.has_completed_verified_order)
+
+            if not has_previous_verified:
+                validated_data["verified"] = False
+
+            order = Order.objects.create(total_price=total_price, **validated_data)
+
+            for order_item in order_items:
+                order_item.order = order
+            OrderItem.objects.bulk_create(order_items)
+
+            # Queued in the outbox with the order, sent by the worker after commit
+            if not has_previous_verified:
+                send_order_verified_email(order)
+            else:
+                send_order_confirmation_email(order)
         return order
 
 
@@ -194,6 +196,13 @@ class OrderVerificationSerializer(serializers.ModelSerializer):
 
 
 
+class OrderItemUpdateSerializer(OrderItemCreateSerializer):
+    # Id of an existing line of the order, omitted for new lines
+    id = serializers.IntegerField(required=False)
+
+
+
+
 class OrderUpdateSerializer(serializers.ModelSerializer):
     # Map customer-related fields from the related Customer model for update operations
     customer_name = serializers.CharField(source='customer.customer_name', required=False, allow_null=True)
@@ -201,7 +210,7 @@ class OrderUpdateSerializer(serializers.ModelSerializer):
     phone = serializers.CharField(source='customer.phone', required=False, allow_null=True)
     address = serializers.CharField(source='customer.address', required=False, allow_null=True)
 
-    order_items = OrderItemCreateSerializer(many=True, write_only=True, required=False)
+    order_items = OrderItemUpdateSerializer(many=True, write_only=True, required=False)
 
     class Meta:
         model = Order
@@ -212,90 +221,127 @@ class OrderUpdateSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("total_price", "created_at", "updated_at")
 
+    # Line fields copied from the request onto a matched line. The order lines
+    # are replaced as a whole, so a field left out of a line gets its default
+    # rather than keeping the old value.
+    LINE_DEFAULTS = {"quantity": 1, "extras": None, "extras_price": 0, "special_instructions": None}
+    LINE_FIELDS = tuple(LINE_DEFAULTS)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Make all fields optional for PATCH
         for field in self.fields.values():
             field.required = False
 
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        order_items_data = attrs.get("order_items")
+        if order_items_data is None:
+            return attrs
+
+        restaurant = attrs.get("restaurant") or self.instance.restaurant
+        items = Item.objects.in_bulk({line["item"] for line in order_items_data})
+
+        missing = sorted({line["item"] for line in order_items_data} - set(items))
+        if missing:
+            raise serializers.ValidationError({"order_items": f"Invalid item id(s): {', '.join(map(str, missing))}"})
+
+        foreign = sorted(item.id for item in items.values() if item.restaurant_id != restaurant.id)
+        if foreign:
+            raise serializers.ValidationError({"order_items": f"Item(s) {', '.join(map(str, foreign))} do not belong to this restaurant."})
+
+        line_ids = [line["id"] for line in order_items_data if "id" in line]
+        if len(line_ids) != len(set(line_ids)):
+            raise serializers.ValidationError({"order_items": "The same order line id is sent more than once."})
+
+        unknown = sorted(set(line_ids) - set(self.instance.order_items.values_list("id", flat=True))) if line_ids else []
+        if unknown:
+            raise serializers.ValidationError({"order_items": f"Order line(s) {', '.join(map(str, unknown))} do not belong to this order."})
+
+        for line in order_items_data:
+            line["item"] = items[line["item"]]
+        return attrs
+
+    def _match_lines(self, existing, order_items_data):
+        """
+        Pair every incoming line with an existing line of the order: by id when
+        the client sends it, otherwise with an unmatched line of the same item.
+        Returns (pairs, new lines, lines to delete).
+        """
+        unmatched = dict(existing)
+        pairs = []
+        new_lines = []
+
+        for line in order_items_data:
+            if "id" in line:
+                pairs.append((unmatched.pop(line["id"]), line))
+
+        for line in order_items_data:
+            if "id" in line:
+                continue
+            order_item = next((oi for oi in unmatched.values() if oi.item_id == line["item"].id), None)
+            if order_item is None:
+                new_lines.append(line)
+            else:
+                del unmatched[order_item.id]
+                pairs.append((order_item, line))
+
+        return pairs, new_lines, list(unmatched.values())
+
+    def _sync_order_items(self, instance, order_items_data):
+        existing = {order_item.id: order_item for order_item in instance.order_items.all()}
+        pairs, new_lines, removed = self._match_lines(existing, order_items_data)
+
+        changed = []
+        for order_item, line in pairs:
+            item = line["item"]
+            values = {field: line.get(field, default) for field, default in self.LINE_DEFAULTS.items()}
+            if item.id == order_item.item_id and all(getattr(order_item, f) == v for f, v in values.items()):
+                continue
+
+            for field, value in values.items():
+                setattr(order_item, field, value)
+            # A changed line is priced and snapshotted like a new one
+            order_item.item = item
+            order_item.item_json = build_item_json(item)
+            order_item.price = calculate_line_price(item, order_item.quantity, order_item.extras_price)
+            changed.append(order_item)
+
+        if removed:
+            OrderItem.objects.filter(id__in=[order_item.id for order_item in removed]).delete()
+        if changed:
+            OrderItem.objects.bulk_update(changed, ["item", "item_json", "price", *self.LINE_FIELDS])
+        if new_lines:
+            line_serializer = self.fields["order_items"].child
+            OrderItem.objects.bulk_create([
+                line_serializer.create({**self.LINE_DEFAULTS, **line, "order": instance}) for line in new_lines
+            ])
+
     def update(self, instance, validated_data):
         order_items_data = validated_data.pop("order_items", None)
 
-        # --- Update basic fields ---
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        total_price = 0
-
-        if order_items_data is not None:
-            instance.order_items.all().delete()
-
-            for item_data in order_items_data:
-                item_id = item_data.get("item")
-                if not item_id:
-                    continue
+        with transaction.atomic():
+            # --- Update basic fields ---
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
 
-                item = Item.objects.get(id=item_id)
-                quantity = item_data.get("quantity", 1)
-                extras_price = float(item_data.get("extras_price") or 0)
+            if order_items_data is not None:
+                self._sync_order_items(instance, order_items_data)
 
-                # ✅ Price calculation (same as create)
-                item_base_price = float(item.price)
-                total_item_price = item_base_price * quantity
-
-                if item.discount:
-                    total_item_price -= (float(item.discount) / 100) * total_item_price
-
-                total_item_price += extras_price
-
-                # ✅ Snapshot of item details
-                item_json = {
-                    "id": item.id,
-                    "name": item.item_name,
-                    "price": float(item.price),
-                    "discount": float(item.discount) if item.discount else None,
-                    "description": getattr(item, "description", None),
-                    "item_name": item.item_name,
-                    "status": item.status,
-                    "image": item.image.url if item.image else None,
-                    "category": item.category,
-                    "preparation_time": str(item.preparation_time) if item.preparation_time else None,
-                    "restaurant_id": item.restaurant.id,
-                }
+            total_price = float(instance.order_items.aggregate(total=Sum("price"))["total"] or 0)
 
-                # ✅ Create the updated OrderItem
-                order_item = OrderItem.objects.create(
-                    order=instance,
-                    item=item,
-                    quantity=quantity,
-                    price=total_item_price,
-                    extras=item_data.get("extras"),
-                    extras_price=extras_price,
-                    special_instructions=item_data.get("special_instructions"),
-                    item_json=item_json,
-                )
-
-                total_price += total_item_price
+            # ✅ Add delivery fee if applicable
+            if instance.order_type == "delivery" and instance.delivery_area:
+                total_price += float(instance.delivery_area.delivery_fee or 0)
 
-        else:
-            # No order_items provided → just recalculate total
-            total_price = sum([float(oi.price) for oi in instance.order_items.all()])
-
-        # ✅ Add delivery fee if applicable
-        if instance.order_type == "delivery" and instance.delivery_area:
-            total_price += float(instance.delivery_area.delivery_fee or 0)
-
-        # ✅ Update total price
-        instance.total_price = total_price
-        instance.save()
+            instance.total_price = total_price
+            instance.save()
 
         return instance
 
 
 
 
-
 # class ItemSerializer(serializers.ModelSerializer):
 #     class Meta:
 #         model = Item
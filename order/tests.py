@@ -1,3 +1,55 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from restaurants.models import Restaurant
+from .models import Order
 
 # Create your tests here.
+
+
+
+
+class RestaurantOrderStatsTests(TestCase):
+    """The order stats are one grouped query over the orders, whatever the window."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create(username="owner", email="owner@example.com")
+        self.restaurant = Restaurant.objects.create(resturent_name="Test", address="Street 1", owner=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def add_order(self, days_ago, price, at=time(12)):
+        created_at = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=days_ago), at))
+        order = Order.objects.create(restaurant=self.restaurant, total_price=price)
+        Order.objects.filter(id=order.id).update(created_at=created_at)
+
+    def test_stats_query_count_does_not_grow_with_the_window(self):
+        self.add_order(0, 10)
+        self.add_order(0, 5, at=time(0, 30))
+        self.add_order(6, 20)
+        self.add_order(7, 40)
+        self.add_order(200, 80)
+
+        # restaurants, grouped orders
+        for days in (7, 90):
+            with self.assertNumQueries(2):
+                response = self.client.get("/owner/restaurant/order-stats/", {"days": days})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["status"], {"total_revenue": Decimal("155"), "total_orders": 5})
+            self.assertEqual(len(response.data[f"last_{days}_days_orders"]), days)
+
+        revenue = response.data["last_90_days_revenue"]
+        self.assertEqual(revenue[0], {"day90": Decimal("15")})
+        self.assertEqual(revenue[6], {"day84": Decimal("20")})
+        self.assertEqual(revenue[7], {"day83": Decimal("40")})
+        self.assertEqual(response.data["last_90_days_orders"][0], {"day90": 2})
+
+        response = self.client.get("/owner/restaurant/order-stats/", {"days": 7})
+        self.assertEqual(response.data["last_7_days_revenue"][6], {"day1": Decimal("20")})
+
+    def test_unsupported_days_value(self):
+        response = self.client.get("/owner/restaurant/order-stats/", {"days": 14})
+        self.assertEqual(response.status_code, 400)
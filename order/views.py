@@ -6,14 +6,18 @@ from drf_yasg import openapi
 from .serializers import OrderCreateSerializer,OrderUpdateSerializer,OrderSerializer,CustomerOrderGroupSerializer,OrderVerificationSerializer
 from .models import Order
 from restaurants.models import Restaurant
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, Min, Max, Case, When, Value, DateField
+from django.db.models.functions import TruncDate
 from datetime import timedelta
 from django.utils import timezone
 from django.utils.timezone import now
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from Channel.events import publish
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from rest_framework.permissions import AllowAny
 from .emails import send_order_confirmation_email
 from accounts.serializers import RestaurantSerializer
@@ -22,8 +26,10 @@ from table.models import Reservation
 from customerService.models import CustomerService
 from table.serializers import ReservationSerializer
 from customerService.serializers import CustomerServiceSerializer
-from django.db import models
 from customer.models import Customer
+from accounts.async_views import AsyncAPIView, api_response, run_in_thread_pool
+from django.utils.dateparse import parse_datetime
+from .pagination import KeysetPagination
 
 
 
@@ -47,15 +53,7 @@ class OrderCreateAPIView(APIView):
             order = serializer.save()
             data = OrderSerializer(order).data
 
-            channel_layer = get_channel_layer()
-
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{order.restaurant.id}",  # Assuming `order.restaurant` is set
-                {
-                    "type": "order_created",
-                    "order": data
-                }
-            )
+            publish(order.restaurant.id, "order_created", "order", data)
 
             return Response(data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -68,13 +66,15 @@ class OrderAutoVerifyView(APIView):
     Public endpoint: verifies order and displays all order info.
     """
     permission_classes = [AllowAny]
+    PAGE_CACHE_TIMEOUT = 60 * 60 * 24
 
     @swagger_auto_schema(
         operation_summary="Auto-verify an order by ID (public)",
         operation_description=(
             "When this endpoint is visited (e.g. via email link), "
             "it automatically verifies the order (sets `verified=True` if not yet verified) "
-            "and returns an HTML confirmation page with full order details."
+            "and returns an HTML confirmation page with full order details. The confirmation "
+            "email is only sent on the first, verifying visit."
         ),
         tags=["Orders"],
         manual_parameters=[
@@ -90,23 +90,51 @@ class OrderAutoVerifyView(APIView):
             200: openapi.Response(
                 description="HTML confirmation page showing full order info"
             ),
+            304: "Page unchanged since the ETag sent in If-None-Match",
             404: "Order not found",
         },
     )
     def get(self, request, pk):
-
-        order = get_object_or_404(Order, pk=pk)
-
-        # If not verified yet → mark as verified
-        if not order.verified:
-            order.verified = True
-            order.save()
-
-
-        serializer = OrderSerializer(order)
-        data = serializer.data
-        
-        restaurant = get_object_or_404(Restaurant, pk=data["restaurant"])
+        state = Order.objects.filter(pk=pk).values("verified", "updated_at").first()
+        if state is None:
+            raise Http404("Order not found")
+
+        # Only the visit that flips the flag verifies the order and queues the
+        # confirmation email; link previewers and reloads don't send it again.
+        if not state["verified"]:
+            with transaction.atomic():
+                order = Order.objects.select_for_update().get(pk=pk)
+                if not order.verified:
+                    order.verified = True
+                    order.save(update_fields=["verified", "updated_at"])
+                    send_order_confirmation_email(order)
+            state = {"verified": order.verified, "updated_at": order.updated_at}
+
+        # The page only changes with the order, so its version is the ETag
+        version = f"{pk}-{int(state['updated_at'].timestamp() * 1000000)}"
+        etag = quote_etag(version)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            cache_key = f"order_verify_page:{version}"
+            html = cache.get(cache_key)
+            if html is None:
+                order = (
+                    Order.objects.select_related("restaurant", "customer")
+                    .prefetch_related("order_items")
+                    .get(pk=pk)
+                )
+                html = self.render_page(order)
+                cache.set(cache_key, html, self.PAGE_CACHE_TIMEOUT)
+            response = HttpResponse(html)
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @staticmethod
+    def render_page(order):
+        data = OrderSerializer(order).data
+        restaurant = order.restaurant
         Delivery_Area = data["delivery_area_json"]
 
         html = f"""
@@ -212,10 +240,7 @@ class OrderAutoVerifyView(APIView):
         </body>
         </html>
         """
-
-        
-        send_order_confirmation_email(order)
-        return HttpResponse(html)
+        return html
 
 
 
@@ -224,7 +249,9 @@ class OrderUpdateAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     @swagger_auto_schema(
-        operation_description="Partially update an order",
+        operation_description="Partially update an order. `order_items`, when sent, replaces the order lines: "
+                              "lines are matched by `id` (or item), and fields left out of a line get their "
+                              "defaults (quantity 1).",
         request_body=OrderUpdateSerializer,
         responses={200: OrderUpdateSerializer, 400: "Validation Error", 404: "Not Found"},
         tags=["Orders"]
@@ -240,14 +267,7 @@ class OrderUpdateAPIView(APIView):
             order = serializer.save()
             data = OrderSerializer(order).data
 
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{order.restaurant.id}",
-                {
-                    "type": "order_updated",
-                    "order": data
-                }
-            )
+            publish(order.restaurant.id, "order_updated", "order", data)
 
             return Response(data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -257,10 +277,19 @@ class OrderUpdateAPIView(APIView):
 
 class RestaurantOrdersView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    # sync_time lags the request by this much: a transaction that commits after
+    # the query with an earlier updated_at is still picked up by the next sync
+    SYNC_OVERLAP = timedelta(minutes=1)
 
     @swagger_auto_schema(
-        operation_description="Retrieve all orders for the logged-in user's restaurant, "
-                              "including order items and full item details.",
+        operation_description="Retrieve the orders of the logged-in user's restaurant, newest first, "
+                              "including order items (item details are the item_json snapshot). "
+                              "Results are cursor paginated: follow `next` (or pass `cursor=next_cursor`) "
+                              "for older orders. With `since`, only orders changed after that time are "
+                              "returned, cancelled ones included; pass the returned `sync_time` as the "
+                              "next `since`. `sync_time` overlaps the previous sync by a minute, so an "
+                              "order may be returned again and should be merged by id.",
         responses={200: OrderSerializer(many=True)},
         manual_parameters=[
             openapi.Parameter(
@@ -270,13 +299,35 @@ class RestaurantOrdersView(APIView):
                 type=openapi.TYPE_STRING,
                 required=False
             ),
+            openapi.Parameter(
+                'since',
+                openapi.IN_QUERY,
+                description="Only orders created or updated after this ISO 8601 datetime",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor of the next page, from a previous response",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Orders per page (default 50, max 200)",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
         ],
         tags=["Orders"],
     )
     def get(self, request, *args, **kwargs):
         user = request.user
-        lean = request.query_params.get('lean')
-        date_str = request.query_params.get('date')  
+        date_str = request.query_params.get('date')
+        since_str = request.query_params.get('since')
+        sync_time = timezone.now() - self.SYNC_OVERLAP
         try:
             restaurant = Restaurant.objects.get(owner=user)
         except Restaurant.DoesNotExist:
@@ -285,12 +336,31 @@ class RestaurantOrdersView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # item_json already snapshots the item, so only the order items are prefetched
         orders = (
             Order.objects.filter(restaurant=restaurant)
-            .exclude(status='cancelled')
-            .prefetch_related("order_items__item")
+            .select_related("customer")
+            .prefetch_related("order_items")
         )
 
+        if since_str:
+            try:
+                since = parse_datetime(since_str.replace(" ", "+"))
+            except ValueError:
+                # Well formed but out of range, e.g. month 13
+                since = None
+            if since is None:
+                return Response(
+                    {"error": "Invalid since format. Use an ISO 8601 datetime."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            # Cancellations are changes too, the dashboard has to drop those orders
+            orders = orders.filter(updated_at__gt=since)
+        else:
+            orders = orders.exclude(status='cancelled')
+
         if date_str:
             try:
                 date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
@@ -300,8 +370,11 @@ class RestaurantOrdersView(APIView):
                     {"error": "Invalid date format. Use YYYY-MM-DD."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(orders, request)
+        serializer = OrderSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data, sync_time=sync_time)
     
 
     
@@ -335,7 +408,9 @@ class OrderDetailAPIView(APIView):
 class CustomerOrdersByPhoneAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     @swagger_auto_schema(
-        operation_description="Get all orders for a customer by phone number (only within restaurants owned by the authenticated user).",
+        operation_description="Get a customer's order totals and their orders, reservations and services by phone number "
+                              "(only within restaurants owned by the authenticated user). The three lists are newest first "
+                              "and cursor paginated independently, see `pagination` in the response.",
         manual_parameters=[
             openapi.Parameter(
                 'phone',
@@ -343,7 +418,11 @@ class CustomerOrdersByPhoneAPIView(APIView):
                 description="Customer phone number",
                 type=openapi.TYPE_STRING,
                 required=True
-            )
+            ),
+            openapi.Parameter('orders_cursor', openapi.IN_QUERY, description="Next page of orders", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('reservations_cursor', openapi.IN_QUERY, description="Next page of reservations", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('services_cursor', openapi.IN_QUERY, description="Next page of services", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Entries per list page (default 50, max 200)", type=openapi.TYPE_INTEGER, required=False),
         ],
         tags=["customer Api"]
     )
@@ -359,43 +438,69 @@ class CustomerOrdersByPhoneAPIView(APIView):
         customer = Customer.objects.filter(phone=phone).first()
         if not customer:
             return Response({"error": "Customer not found"}, status=404)
-        
-        orders = Order.objects.filter(restaurant__in=restaurants, customer__phone=phone).order_by("-created_at")
 
-        total_order = orders.count()
-        total_order_price = orders.aggregate(total=models.Sum("total_price"))["total"] or 0
-        first_order_date = orders.order_by("created_at").first().created_at if orders.exists() else None
-        last_order_date = orders.order_by("-created_at").first().created_at if orders.exists() else None
+        orders = Order.objects.filter(restaurant__in=restaurants, customer=customer)
 
-        reservations = Reservation.objects.filter(table__restaurant__in=restaurants, customer__phone=phone).order_by("-created_at")
-        services = CustomerService.objects.filter(restaurant__in=restaurants, customer__phone=phone).order_by("-created_at")
+        # Totals over the whole history in one query, the lists below are paginated
+        stats = orders.aggregate(
+            total_order=Count("id"),
+            total_order_price=Sum("total_price"),
+            first_order_date=Min("created_at"),
+            last_order_date=Max("created_at"),
+        )
 
+        histories = {
+            "orders": (
+                orders.select_related("customer").prefetch_related("order_items"),
+                OrderSerializer,
+            ),
+            "reservations": (
+                Reservation.objects.filter(table__restaurant__in=restaurants, customer=customer)
+                .select_related("customer", "table"),
+                ReservationSerializer,
+            ),
+            "services": (
+                CustomerService.objects.filter(restaurant__in=restaurants, customer=customer)
+                .select_related("customer"),
+                CustomerServiceSerializer,
+            ),
+        }
 
-        return Response({
+        data = {
             "customer": {
                 "id": customer.id,
                 "customer_name": customer.customer_name,
                 "email": customer.email,
                 "phone": customer.phone,
                 "address": customer.address,
-                "total_order": total_order,
-                "total_order_price": total_order_price,
-                "first_order_date": first_order_date,
-                "last_order_date": last_order_date,
+                "total_order": stats["total_order"],
+                "total_order_price": stats["total_order_price"] or 0,
+                "first_order_date": stats["first_order_date"],
+                "last_order_date": stats["last_order_date"],
             },
-            "orders": OrderSerializer(orders, many=True).data,
-            "reservations": ReservationSerializer(reservations, many=True).data,
-            "services": CustomerServiceSerializer(services, many=True).data,
-        }, status=200)
+            "pagination": {},
+        }
+
+        # Every list has its own cursor: orders_cursor, reservations_cursor, services_cursor
+        for name, (queryset, serializer_class) in histories.items():
+            paginator = KeysetPagination(cursor_query_param=f"{name}_cursor")
+            page = paginator.paginate_queryset(queryset, request)
+            data[name] = serializer_class(page, many=True).data
+            data["pagination"][name] = {
+                "next": paginator.get_next_link(),
+                "next_cursor": paginator.get_next_cursor(),
+            }
+
+        return Response(data, status=200)
 
 
 
 
-class PublicOrderCreateAPIView(APIView):
+class PublicOrderCreateAPIView(AsyncAPIView):
     """
     Public API endpoint to create an order (no login required).
+    Native async view, takes the OrderCreateSerializer payload.
     """
-    permission_classes = [permissions.AllowAny]
 
     @swagger_auto_schema(
         operation_description="Public API: Create a new order with order items (no authentication required).",
@@ -403,32 +508,41 @@ class PublicOrderCreateAPIView(APIView):
         responses={201: OrderSerializer, 400: "Validation Error"},
         tags=["Webhook"]
     )
-    def post(self, request, *args, **kwargs):
-        serializer = OrderCreateSerializer(data=request.data)
-        if serializer.is_valid():
-            order = serializer.save()
-            data = OrderSerializer(order).data
-
-            channel_layer = get_channel_layer()
-
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{order.restaurant.id}",
-                {
-                    "type": "order_created",
-                    "order": data
-                }
-            )
-            return Response(data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    async def post(self, request, *args, **kwargs):
+        data, errors = await run_in_thread_pool(self.create_order)(request.data)
+        if errors:
+            return api_response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return api_response(data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def create_order(payload):
+        serializer = OrderCreateSerializer(data=payload)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        order = serializer.save()
+        data = OrderSerializer(order).data
+        publish(order.restaurant_id, "order_created", "order", data)
+        return data, None
     
 
 
 
 class RestaurantOrderStatsAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    ALLOWED_DAYS = (7, 30, 90)
 
     @swagger_auto_schema(
-        operation_description="Get the total revenue and total orders, as well as daily revenue and order statistics for the last 7 days for the restaurant of the authenticated user.",
+        operation_description="Get the total revenue and total orders, as well as daily revenue and order statistics for the last 7, 30 or 90 days for the restaurant of the authenticated user. The response keys follow the window, e.g. last_30_days_revenue.",
+        manual_parameters=[
+            openapi.Parameter(
+                'days',
+                openapi.IN_QUERY,
+                description="Size of the daily window: 7, 30 or 90 (default 7).",
+                type=openapi.TYPE_INTEGER,
+                enum=[7, 30, 90],
+                default=7
+            ),
+        ],
         responses={
             200: openapi.Response(
                 description="Success",
@@ -459,6 +573,15 @@ class RestaurantOrderStatsAPIView(APIView):
                     },
                 ),
             ),
+            400: openapi.Response(
+                description="Unsupported days value",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "error": openapi.Schema(type=openapi.TYPE_STRING),
+                    },
+                ),
+            ),
             404: openapi.Response(
                 description="Restaurant not found or no orders",
                 schema=openapi.Schema(
@@ -479,30 +602,42 @@ class RestaurantOrderStatsAPIView(APIView):
         if not restaurants:
             return Response({"error": "No restaurants found for this user."}, status=status.HTTP_404_NOT_FOUND)
 
-        # Filter orders by user's restaurant
-        orders = Order.objects.filter(restaurant__in=restaurants)
-
-        # Calculate total revenue and total orders
-        total_revenue = orders.aggregate(total_revenue=Sum('total_price'))['total_revenue'] or 0
-        total_orders = orders.count()
-
-        # Get the last 7 days from today
-        today = timezone.now().date()
-        last_7_days = [today - timedelta(days=i) for i in range(7)]
-
-        # Initialize revenue and order counts for the last 7 days
-        last_7_days_revenue = []
-        last_7_days_orders = []
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            days = None
+        if days not in self.ALLOWED_DAYS:
+            return Response({"error": "days must be one of 7, 30 or 90."}, status=status.HTTP_400_BAD_REQUEST)
+
+        today = timezone.localdate()
+        window_start = timezone.make_aware(datetime.combine(today - timedelta(days=days - 1), datetime.min.time()))
+
+        # One grouped query over the orders: one row per local day inside the
+        # window plus a single row (day=None) for everything before it.
+        rows = (
+            Order.objects.filter(restaurant__in=restaurants)
+            .annotate(day=Case(
+                When(created_at__gte=window_start, then=TruncDate('created_at')),
+                default=Value(None),
+                output_field=DateField(),
+            ))
+            .values('day')
+            .annotate(revenue=Sum('total_price'), orders=Count('id'))
+            .order_by()
+        )
+        daily_stats = {row['day']: row for row in rows}
 
-        # Loop through the last 7 days and calculate daily statistics
-        for day in last_7_days:
-            daily_orders = orders.filter(created_at__date=day)
-            daily_revenue = daily_orders.aggregate(daily_revenue=Sum('total_price'))['daily_revenue'] or 0
-            daily_order_count = daily_orders.count()
+        total_revenue = sum(row['revenue'] or 0 for row in daily_stats.values())
+        total_orders = sum(row['orders'] or 0 for row in daily_stats.values())
 
-            # Append the results for this day
-            last_7_days_revenue.append({f"day{7 - (today - day).days}": daily_revenue})
-            last_7_days_orders.append({f"day{7 - (today - day).days}": daily_order_count})
+        # Zero-fill the window, most recent day first
+        revenue_by_day = []
+        orders_by_day = []
+        for offset in range(days):
+            day = today - timedelta(days=offset)
+            daily = daily_stats.get(day, {})
+            revenue_by_day.append({f"day{days - offset}": daily.get('revenue') or 0})
+            orders_by_day.append({f"day{days - offset}": daily.get('orders') or 0})
 
         # Return the response
         return Response({
@@ -510,8 +645,8 @@ class RestaurantOrderStatsAPIView(APIView):
                 "total_revenue": total_revenue,
                 "total_orders": total_orders
             },
-            "last_7_days_revenue": last_7_days_revenue,
-            "last_7_days_orders": last_7_days_orders
+            f"last_{days}_days_revenue": revenue_by_day,
+            f"last_{days}_days_orders": orders_by_day
         })
 
 
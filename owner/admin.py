@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import DailyRestaurantStats
 
 # Register your models here.
+
+
+@admin.register(DailyRestaurantStats)
+class DailyRestaurantStatsAdmin(admin.ModelAdmin):
+    list_display = ('restaurant', 'date', 'orders', 'revenue', 'reservations', 'calls', 'updated_at')
+    list_filter = ('restaurant',)
+    date_hierarchy = 'date'
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class OwnerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'owner'
+
+    def ready(self):
+        import owner.signals
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+from restaurants.models import Restaurant
+from order.models import Order
+from table.models import Reservation
+from AIvapi.models import Assistance, CallInformations
+from owner.rollups import local_day, refresh_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyRestaurantStats rollups from the raw orders, reservations and calls."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=0, help="Only rebuild the last N days (0 = since the first order, reservation or call).")
+        parser.add_argument("--restaurant", type=int, help="Only rebuild this restaurant id.")
+
+    def handle(self, *args, **options):
+        restaurants = Restaurant.objects.all()
+        if options["restaurant"]:
+            restaurants = restaurants.filter(id=options["restaurant"])
+
+        today = timezone.localdate()
+        rebuilt = 0
+        for restaurant in restaurants:
+            if options["days"]:
+                first_day = today - timedelta(days=options["days"] - 1)
+            else:
+                first = [
+                    Order.objects.filter(restaurant=restaurant).aggregate(first=Min("created_at"))["first"],
+                    Reservation.objects.filter(table__restaurant=restaurant).aggregate(first=Min("created_at"))["first"],
+                    CallInformations.objects.filter(
+                        assistant_id__in=Assistance.objects.filter(restaurant=restaurant).values("assistant_id")
+                    ).aggregate(first=Min("call_date_utc"))["first"],
+                ]
+                first = [moment for moment in first if moment]
+                first_day = local_day(min(first)) if first else today
+
+            day = first_day
+            while day <= today:
+                refresh_daily_stats(restaurant.id, day)
+                day += timedelta(days=1)
+                rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} restaurant days"))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('restaurants', '0010_openandclosetime_is_closed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRestaurantStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local (TIME_ZONE) day')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('new_customer_orders', models.PositiveIntegerField(default=0, help_text="Orders that are the customer's first at this restaurant")),
+                ('returning_customer_orders', models.PositiveIntegerField(default=0)),
+                ('new_customer_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('returning_customer_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reservations', models.PositiveIntegerField(default=0)),
+                ('reservation_guests', models.PositiveIntegerField(default=0)),
+                ('walk_ins', models.PositiveIntegerField(default=0)),
+                ('new_customer_reservations', models.PositiveIntegerField(default=0)),
+                ('returning_customer_reservations', models.PositiveIntegerField(default=0)),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('call_seconds', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='restaurants.restaurant')),
+            ],
+            options={
+                'unique_together': {('restaurant', 'date')},
+            },
+        ),
+    ]
@@ -1,3 +1,38 @@
 from django.db import models
+from restaurants.models import Restaurant
 
 # Create your models here.
+
+
+
+class DailyRestaurantStats(models.Model):
+    """
+    Per-restaurant, per-day rollup of the dashboard metrics (see owner.rollups).
+    Refreshed after every order / reservation / call write and repaired by beat.
+    """
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField(help_text="Local (TIME_ZONE) day")
+
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    new_customer_orders = models.PositiveIntegerField(default=0, help_text="Orders that are the customer's first at this restaurant")
+    returning_customer_orders = models.PositiveIntegerField(default=0)
+    new_customer_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    returning_customer_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    reservations = models.PositiveIntegerField(default=0)
+    reservation_guests = models.PositiveIntegerField(default=0)
+    walk_ins = models.PositiveIntegerField(default=0)
+    new_customer_reservations = models.PositiveIntegerField(default=0)
+    returning_customer_reservations = models.PositiveIntegerField(default=0)
+
+    calls = models.PositiveIntegerField(default=0)
+    call_seconds = models.FloatField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('restaurant', 'date')
+
+    def __str__(self):
+        return f"{self.restaurant.resturent_name} - {self.date}"
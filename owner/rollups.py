@@ -0,0 +1,143 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from order.models import Order
+from table.models import Reservation
+from AIvapi.models import Assistance, CallInformations
+from .models import DailyRestaurantStats
+
+
+STAT_FIELDS = [
+    'orders', 'revenue',
+    'new_customer_orders', 'returning_customer_orders',
+    'new_customer_revenue', 'returning_customer_revenue',
+    'reservations', 'reservation_guests', 'walk_ins',
+    'new_customer_reservations', 'returning_customer_reservations',
+    'calls', 'call_seconds',
+]
+
+
+
+
+def local_day(moment):
+    """Local (TIME_ZONE) day of an aware datetime, the key of the rollup rows."""
+    if isinstance(moment, str):
+        # e.g. CallInformations.call_date_utc right after create(), still the ISO string from Vapi
+        moment = parse_datetime(moment)
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return timezone.localdate(moment)
+
+
+def day_bounds(day):
+    """[start, end) datetimes of a local day, index friendly unlike __date."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+
+
+def _order_stats(restaurant_id, start, end):
+    # An order is a returning customer's when the customer ordered here before
+    earlier = Order.objects.filter(
+        restaurant_id=restaurant_id,
+        customer_id=OuterRef('customer_id'),
+        created_at__lt=OuterRef('created_at'),
+    )
+    totals = (
+        Order.objects.filter(restaurant_id=restaurant_id, created_at__gte=start, created_at__lt=end)
+        .annotate(returning=Exists(earlier))
+        .aggregate(
+            orders=Count('id'),
+            revenue=Sum('total_price'),
+            returning_customer_orders=Count('id', filter=Q(returning=True)),
+            returning_customer_revenue=Sum('total_price', filter=Q(returning=True)),
+        )
+    )
+    revenue = totals['revenue'] or Decimal(0)
+    returning_revenue = totals['returning_customer_revenue'] or Decimal(0)
+    return {
+        'orders': totals['orders'],
+        'revenue': revenue,
+        'new_customer_orders': totals['orders'] - totals['returning_customer_orders'],
+        'returning_customer_orders': totals['returning_customer_orders'],
+        'new_customer_revenue': revenue - returning_revenue,
+        'returning_customer_revenue': returning_revenue,
+    }
+
+
+def _reservation_stats(restaurant_id, start, end):
+    earlier = Reservation.objects.filter(
+        table__restaurant_id=restaurant_id,
+        customer_id=OuterRef('customer_id'),
+        created_at__lt=OuterRef('created_at'),
+    )
+    totals = (
+        Reservation.objects.filter(table__restaurant_id=restaurant_id, created_at__gte=start, created_at__lt=end)
+        .annotate(returning=Exists(earlier))
+        .aggregate(
+            reservations=Count('id'),
+            reservation_guests=Sum('guest_no'),
+            walk_ins=Count('id', filter=Q(status='walk-in')),
+            returning_customer_reservations=Count('id', filter=Q(returning=True)),
+        )
+    )
+    return {
+        'reservations': totals['reservations'],
+        'reservation_guests': totals['reservation_guests'] or 0,
+        'walk_ins': totals['walk_ins'],
+        'new_customer_reservations': totals['reservations'] - totals['returning_customer_reservations'],
+        'returning_customer_reservations': totals['returning_customer_reservations'],
+    }
+
+
+def _call_stats(restaurant_id, start, end):
+    totals = CallInformations.objects.filter(
+        assistant_id__in=Assistance.objects.filter(restaurant_id=restaurant_id).values('assistant_id'),
+        call_date_utc__gte=start,
+        call_date_utc__lt=end,
+    ).aggregate(calls=Count('id'), call_seconds=Sum('duration_secs'))
+    return {'calls': totals['calls'], 'call_seconds': totals['call_seconds'] or 0}
+
+
+
+
+def refresh_daily_stats(restaurant_id, day):
+    """
+    Recompute one restaurant's rollup row for one local day from the raw rows.
+    Idempotent, so it is safe to run again for the same day at any time.
+    """
+    start, end = day_bounds(day)
+    stats = {}
+    stats.update(_order_stats(restaurant_id, start, end))
+    stats.update(_reservation_stats(restaurant_id, start, end))
+    stats.update(_call_stats(restaurant_id, start, end))
+
+    if not any(stats.values()):
+        DailyRestaurantStats.objects.filter(restaurant_id=restaurant_id, date=day).delete()
+        return None
+
+    row, _ = DailyRestaurantStats.objects.update_or_create(
+        restaurant_id=restaurant_id, date=day, defaults=stats,
+    )
+    return row
+
+
+
+
+def sum_daily_stats(restaurants, start_day=None, end_day=None):
+    """
+    Totals of the rollup rows of the given restaurants, optionally limited to
+    start_day..end_day (inclusive). Every field defaults to 0.
+    """
+    rows = DailyRestaurantStats.objects.filter(restaurant__in=restaurants)
+    if start_day:
+        rows = rows.filter(date__gte=start_day)
+    if end_day:
+        rows = rows.filter(date__lte=end_day)
+
+    totals = rows.aggregate(**{field: Sum(field) for field in STAT_FIELDS})
+    return {field: value or 0 for field, value in totals.items()}
@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from order.models import Order
+from table.models import Table, Reservation
+from AIvapi.models import Assistance, CallInformations
+from .rollups import local_day
+from .tasks import refresh_restaurant_daily_stats
+
+
+
+def refresh_daily_stats_on_commit(restaurant_ids, *moments):
+    """Queue a refresh of the rollup rows of the days the `moments` fall on, after commit."""
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id}
+    days = {local_day(moment).isoformat() for moment in moments if moment is not None}
+    if not restaurant_ids or not days:
+        return
+
+    def refresh():
+        for restaurant_id in restaurant_ids:
+            for day in days:
+                refresh_restaurant_daily_stats.delay(restaurant_id, day)
+
+    transaction.on_commit(refresh)
+
+
+def first_visit_moments(instance, created, customer_rows):
+    """
+    Creation times of the rows whose new / returning flag this write can flip.
+
+    `customer_rows` are the customer's orders (or reservations) at the
+    restaurant. A new row after the customer's first one changes nothing
+    else; any other write may move the customer's first row, which flips
+    the current first row and the one following `instance`. Re-dating a row
+    (created_at is not editable through the API) also leaves the day it was
+    moved away from stale until `manage.py rebuild_daily_stats` runs.
+    """
+    if not instance.customer_id:
+        return []
+    if created and customer_rows.filter(created_at__lt=instance.created_at).exists():
+        return []
+    customer_rows = customer_rows.exclude(pk=instance.pk).order_by('created_at').values_list('created_at', flat=True)
+    return [
+        *customer_rows[:1],
+        *customer_rows.filter(created_at__gt=instance.created_at)[:1],
+    ]
+
+
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def order_changed(sender, instance, created=False, **kwargs):
+    customer_orders = Order.objects.filter(restaurant_id=instance.restaurant_id, customer_id=instance.customer_id)
+    refresh_daily_stats_on_commit(
+        [instance.restaurant_id],
+        instance.created_at,
+        *first_visit_moments(instance, created, customer_orders),
+    )
+
+
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def reservation_changed(sender, instance, created=False, **kwargs):
+    restaurant_ids = list(Table.objects.filter(id=instance.table_id).values_list("restaurant_id", flat=True))
+    customer_reservations = Reservation.objects.filter(
+        table__restaurant_id__in=restaurant_ids, customer_id=instance.customer_id
+    )
+    refresh_daily_stats_on_commit(
+        restaurant_ids,
+        instance.created_at,
+        *first_visit_moments(instance, created, customer_reservations),
+    )
+
+
+
+
+@receiver(post_save, sender=CallInformations)
+@receiver(post_delete, sender=CallInformations)
+def call_information_changed(sender, instance, **kwargs):
+    restaurant_ids = Assistance.objects.filter(assistant_id=instance.assistant_id).values_list("restaurant_id", flat=True)
+    refresh_daily_stats_on_commit(restaurant_ids, instance.call_date_utc)
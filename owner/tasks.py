@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+from celery import shared_task
+from django.utils import timezone
+from restaurants.models import Restaurant
+from .rollups import refresh_daily_stats
+
+
+REPAIR_DAYS = 2
+
+
+
+
+@shared_task
+def refresh_restaurant_daily_stats(restaurant_id, day):
+    """Recompute one rollup row, queued by owner.signals after a write commits."""
+    refresh_daily_stats(restaurant_id, date.fromisoformat(day))
+
+
+@shared_task
+def repair_daily_stats(days=REPAIR_DAYS):
+    """
+    Recompute the last days of every restaurant, catching writes that bypass the
+    signals (queryset.update(), raw SQL, lost tasks).
+    """
+    today = timezone.localdate()
+    restaurant_ids = list(Restaurant.objects.values_list('id', flat=True))
+    for restaurant_id in restaurant_ids:
+        for offset in range(days):
+            refresh_daily_stats(restaurant_id, today - timedelta(days=offset))
+    return f"Repaired {len(restaurant_ids)} restaurants over {days} days"
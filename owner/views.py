@@ -11,17 +11,16 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from accounts.permissions import IsOwnerRole
 from AIvapi.update_agent import UpdateAgent
 from AIvapi.models import Assistance
-from order.models import Order
-from table.models import Reservation
 from customerService.models import CustomerService
 from AIvapi.models import CallInformations , Assistance
-from django.db.models import Count, Sum ,F,Q,FloatField
+from django.db.models import Count ,F,Q,FloatField
 from django.db.models.functions import Cast
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models.functions import TruncMonth
 from datetime import datetime
+from .rollups import sum_daily_stats
 
 
 
@@ -251,47 +250,25 @@ class RestaurantStatsAPIView(APIView):
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
 
-        start_datetime = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
-        end_datetime = timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
 
-        # --- Query Data ---
-        orders = Order.objects.filter(
-            restaurant__in=restaurants,
-            created_at__range=(start_datetime, end_datetime)
-        )
-        reservations = Reservation.objects.filter(
-            table__restaurant__in=restaurants,
-            created_at__range=(start_datetime, end_datetime)
-        )
+        # --- Daily rollups, see owner.rollups ---
+        # A customer counts as new for their first order / reservation at the
+        # restaurant and as returning for every later one.
+        totals = sum_daily_stats(restaurants, start_date, end_date)
 
         # ===============================
         # 📊 ORDER METRICS
         # ===============================
-        total_orders = orders.count()
-        total_revenue = orders.aggregate(total=Sum('total_price'))['total'] or 0
+        total_orders = totals['orders']
+        total_revenue = totals['revenue']
         average_order_value = total_revenue / total_orders if total_orders > 0 else 0
 
-        # Aggregate by phone (customer)
-        customer_order_counts = (
-            orders.values('customer__phone')
-            .annotate(order_count=Count('id'), total_spent=Sum('total_price'))
-        )
-
-        # Separate new vs returning customers
-        new_customers = [c['customer__phone'] for c in customer_order_counts if c['order_count'] == 1]
-        returning_customers = [c['customer__phone'] for c in customer_order_counts if c['order_count'] > 1]
-
-        # Revenue splits
-        new_customer_revenue = (
-            orders.filter(customer__phone__in=new_customers).aggregate(total=Sum('total_price'))['total'] or 0
-        )
-        returning_customer_revenue = (
-            orders.filter(customer__phone__in=returning_customers).aggregate(total=Sum('total_price'))['total'] or 0
-        )
-
-        # Order counts
-        number_of_new_customer_orders = orders.filter(customer__phone__in=new_customers).count()
-        number_of_returning_customer_orders = orders.filter(customer__phone__in=returning_customers).count()
+        number_of_new_customer_orders = totals['new_customer_orders']
+        number_of_returning_customer_orders = totals['returning_customer_orders']
 
         # Percentages
         new_customer_order_percentage = (
@@ -304,20 +281,9 @@ class RestaurantStatsAPIView(APIView):
         # ===============================
         # 📅 RESERVATION METRICS
         # ===============================
-        total_reservations = reservations.count()
-        total_reservation_guests = reservations.aggregate(Sum('guest_no'))['guest_no__sum'] or 0
-
-        # Group by phone
-        reservation_counts = (
-            reservations.values('customer__phone')
-            .annotate(res_count=Count('id'))
-        )
-
-        new_reservation_customers = [r['customer__phone'] for r in reservation_counts if r['res_count'] == 1]
-        returning_reservation_customers = [r['customer__phone'] for r in reservation_counts if r['res_count'] > 1]
-
-        number_of_new_customer_reservations = reservations.filter(customer__phone__in=new_reservation_customers).count()
-        number_of_returning_customer_reservations = reservations.filter(customer__phone__in=returning_reservation_customers).count()
+        total_reservations = totals['reservations']
+        number_of_new_customer_reservations = totals['new_customer_reservations']
+        number_of_returning_customer_reservations = totals['returning_customer_reservations']
 
         # Percentages
         new_customer_reservation_percentage = (
@@ -335,8 +301,8 @@ class RestaurantStatsAPIView(APIView):
             "total_orders": total_orders,
             "revenus_from_orders": total_revenue,
             "average_order_value": round(average_order_value, 2),
-            "new_customer_order_revenue": new_customer_revenue,
-            "returning_customer_order_revenue": returning_customer_revenue,
+            "new_customer_order_revenue": totals['new_customer_revenue'],
+            "returning_customer_order_revenue": totals['returning_customer_revenue'],
             "number_of_new_customer_orders": number_of_new_customer_orders,
             "number_of_returning_customer_orders": number_of_returning_customer_orders,
             "new_customer_order_percentage": round(new_customer_order_percentage, 2),
@@ -344,11 +310,16 @@ class RestaurantStatsAPIView(APIView):
 
             # --- Reservations ---
             "number_of_reservations": total_reservations,
-            "number_of_reservation_guests": total_reservation_guests,
+            "number_of_reservation_guests": totals['reservation_guests'],
+            "number_of_walk_ins": totals['walk_ins'],
             "number_of_new_customer_reservations": number_of_new_customer_reservations,
             "number_of_returning_customer_reservations": number_of_returning_customer_reservations,
             "new_customer_reservation_percentage": round(new_customer_reservation_percentage, 2),
             "returning_customer_reservation_percentage": round(returning_customer_reservation_percentage, 2),
+
+            # --- Calls ---
+            "number_of_calls": totals['calls'],
+            "call_minutes": round(totals['call_seconds'] / 60, 2),
         }
 
         return Response(stats, status=status.HTTP_200_OK)
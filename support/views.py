@@ -10,8 +10,7 @@ from drf_yasg import openapi
 from rest_framework.parsers import MultiPartParser, FormParser
 from restaurants.models import Restaurant
 from django.shortcuts import get_object_or_404
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from Channel.events import publish
 
 # Create your views here.
 
@@ -78,14 +77,7 @@ class CreateSupportView(APIView):
         if serializer.is_valid():
             support = serializer.save(restaurant=restaurant)
 
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant.id}",
-                {
-                    "type": "support_created",
-                    "support": SupportSerializer(support, context={'request': request}).data
-                }
-            )
+            publish(restaurant.id, "support_created", "support", SupportSerializer(support, context={'request': request}).data)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
         # Return errors if the serializer is invalid
@@ -170,13 +162,6 @@ class SupportStatusUpdateAPIView(APIView):
             serializer.save()
             data = SupportSerializerGet(support, context={'request': request}).data
             restaurant_id = support.restaurant.id
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant_id}",
-                {
-                    "type": "support_updated",
-                    "support": data
-                }
-            )
+            publish(restaurant_id, "support_updated", "support", data)
             return Response(data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
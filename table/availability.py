@@ -0,0 +1,210 @@
+from bisect import bisect_left
+from datetime import time, timedelta
+from django.core.cache import cache
+from restaurants.models import OpenAndCloseTime
+from .constants import BUFFER_BEFORE, BUFFER_AFTER, BLOCKING_EXCLUDED_STATUSES, OVERLAP_CONSTRAINT
+from .models import Table, Reservation
+
+
+# Candidate start times of the free-slot search
+SLOT_STEP = timedelta(minutes=15)
+
+# Availability endpoint defaults
+DEFAULT_DURATION = timedelta(hours=1)
+MAX_SLOTS = 10
+
+# Entries are versioned per restaurant (see invalidate_table_availability),
+# the timeout only bounds how long an orphaned entry can live in the cache.
+AVAILABILITY_TIMEOUT = 60 * 60 * 24
+
+
+
+
+def _seconds(value):
+    """Seconds since midnight of a time or datetime."""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _time(seconds):
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _merge(intervals):
+    """Sorted, disjoint (starts, ends) lists covering the given intervals."""
+    starts, ends = [], []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+
+
+class DayAvailability:
+    """
+    The reservations of one restaurant-day, indexed per table.
+
+    Every reservation is widened by the buffers into the interval it blocks;
+    the blocked intervals of a table are merged into sorted, disjoint lists,
+    so checking a slot is one bisect: O(log n) per table.
+    """
+
+    def __init__(self, date, tables, blocked, opening=None, closing=None):
+        self.date = date
+        # {table_id: {"id", "table_name", "total_set", "status"}}
+        self.tables = tables
+        # {table_id: ([starts], [ends])} in seconds since midnight
+        self.blocked = blocked
+        self.opening = opening
+        self.closing = closing
+
+    @staticmethod
+    def _querysets(restaurant_id, date):
+        tables = (
+            Table.objects.filter(restaurant_id=restaurant_id)
+            .values("id", "table_name", "total_set", "status")
+            .order_by("total_set", "id")
+        )
+        reservations = (
+            Reservation.objects.filter(table__restaurant_id=restaurant_id, date=date)
+            .exclude(status__in=BLOCKING_EXCLUDED_STATUSES)
+            .values_list("table_id", "from_time", "to_time")
+        )
+        hours = OpenAndCloseTime.objects.filter(restaurant_id=restaurant_id, day_of_week=date.strftime("%A").lower())
+        return tables, reservations, hours
+
+    @classmethod
+    def build(cls, restaurant_id, date):
+        tables, reservations, hours = cls._querysets(restaurant_id, date)
+        return cls.from_rows(date, list(tables), list(reservations), hours.first())
+
+    @classmethod
+    async def abuild(cls, restaurant_id, date):
+        """Async version of build(), same three queries."""
+        tables, reservations, hours = cls._querysets(restaurant_id, date)
+        return cls.from_rows(
+            date,
+            [table async for table in tables],
+            [reservation async for reservation in reservations],
+            await hours.afirst(),
+        )
+
+    @classmethod
+    def from_rows(cls, date, tables, reservations, hours):
+        tables = {table["id"]: table for table in tables}
+
+        before = int(BUFFER_BEFORE.total_seconds())
+        after = int(BUFFER_AFTER.total_seconds())
+        intervals = {table_id: [] for table_id in tables}
+        for table_id, from_time, to_time in reservations:
+            intervals[table_id].append((_seconds(from_time) - before, _seconds(to_time) + after))
+
+        opening = closing = None
+        if hours and not hours.is_closed and hours.opening_time and hours.closing_time:
+            opening, closing = _seconds(hours.opening_time), _seconds(hours.closing_time)
+
+        blocked = {table_id: _merge(table_intervals) for table_id, table_intervals in intervals.items()}
+        return cls(date, tables, blocked, opening, closing)
+
+    def is_free(self, table_id, from_time, to_time):
+        """True when [from_time, to_time) keeps the buffers to every reservation of the table."""
+        starts, ends = self.blocked.get(table_id, ([], []))
+        start, end = _seconds(from_time), _seconds(to_time)
+        # The only candidate is the last blocked interval starting before `end`
+        index = bisect_left(starts, end) - 1
+        return index < 0 or ends[index] <= start
+
+    def is_open(self, from_time, to_time):
+        if self.opening is None:
+            return False
+        return self.opening <= _seconds(from_time) and _seconds(to_time) <= self.closing
+
+    def fitting_tables(self, guest_no):
+        """Active tables seating the party, smallest first."""
+        return [
+            table for table in self.tables.values()
+            if table["status"] == "active" and table["total_set"] >= guest_no
+        ]
+
+    def free_tables(self, guest_no, from_time, to_time):
+        if not self.is_open(from_time, to_time):
+            return []
+        return [
+            table for table in self.fitting_tables(guest_no)
+            if self.is_free(table["id"], from_time, to_time)
+        ]
+
+    def next_free_slots(self, guest_no, duration, after=None, limit=3):
+        """
+        The first `limit` start times (on SLOT_STEP boundaries, not before `after`)
+        at which at least one fitting table is free for `duration`.
+        """
+        if self.opening is None:
+            return []
+
+        step = int(SLOT_STEP.total_seconds())
+        length = int(duration.total_seconds())
+        start = self.opening if after is None else max(self.opening, _seconds(after))
+        start = -(-start // step) * step
+
+        tables = self.fitting_tables(guest_no)
+        slots = []
+        while start + length <= self.closing and len(slots) < limit:
+            from_time, to_time = _time(start), _time(start + length)
+            free = [table for table in tables if self.is_free(table["id"], from_time, to_time)]
+            if free:
+                slots.append({"from_time": from_time, "to_time": to_time, "tables": free})
+            start += step
+        return slots
+
+
+
+
+def is_overlap_violation(error):
+    """True when an IntegrityError comes from the reservation overlap constraint."""
+    diag = getattr(error.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None) == OVERLAP_CONSTRAINT
+
+
+
+
+def _version_key(restaurant_id):
+    return f"table_availability_version:{restaurant_id}"
+
+
+def invalidate_table_availability(restaurant_id):
+    """Bump the availability version of a restaurant, every cached day goes stale."""
+    version_key = _version_key(restaurant_id)
+    cache.add(version_key, 0, timeout=None)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(version_key, 1, timeout=None)
+
+
+def get_day_availability(restaurant_id, date):
+    """DayAvailability of a restaurant-day, built once per reservation version."""
+    # The version is read before building, so a write that lands while the
+    # index is being built leaves it under an outdated key.
+    version = cache.get(_version_key(restaurant_id), 0)
+    key = f"table_availability:{restaurant_id}:{version}:{date.isoformat()}"
+    availability = cache.get(key)
+    if availability is None:
+        availability = DayAvailability.build(restaurant_id, date)
+        cache.set(key, availability, AVAILABILITY_TIMEOUT)
+    return availability
+
+
+async def aget_day_availability(restaurant_id, date):
+    """Async version of get_day_availability()."""
+    version = await cache.aget(_version_key(restaurant_id), 0)
+    key = f"table_availability:{restaurant_id}:{version}:{date.isoformat()}"
+    availability = await cache.aget(key)
+    if availability is None:
+        availability = await DayAvailability.abuild(restaurant_id, date)
+        await cache.aset(key, availability, AVAILABILITY_TIMEOUT)
+    return availability
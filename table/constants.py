@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+
 
 
 STATUS_CHOICES = [
@@ -18,4 +21,22 @@ RESERVATION_STATUS = [
         ('walk-in', 'Walk-in'),
         ('finished', 'Finished'),
         ('canceled', 'Canceled'),
-]
\ No newline at end of file
+]
+
+
+
+# A new reservation must start at least 10 minutes after an existing one ends
+# and end at least 60 minutes before the next one starts on the same table.
+BUFFER_BEFORE = timedelta(minutes=60)
+# Reservation.blocked_span includes BUFFER_AFTER: changing it needs a data
+# migration recomputing the span of existing rows (see table migration 0009).
+BUFFER_AFTER = timedelta(minutes=10)
+
+# Cancelled reservations don't hold their table
+BLOCKING_EXCLUDED_STATUSES = ['canceled']
+
+# Exclusion constraint keeping holding reservations of a table apart
+OVERLAP_CONSTRAINT = 'reservation_table_no_overlap'
+
+# Reservation reminder emails go out this long before the start
+REMINDER_LEAD = timedelta(minutes=30)
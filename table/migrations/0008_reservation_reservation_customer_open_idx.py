@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('table', '0007_remove_reservation_allergy_reservation_comment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'finished'), _negated=True), fields=['customer'], name='reservation_customer_open_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:55
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+# table.constants.BUFFER_AFTER as of this migration. Migrations must not follow
+# later changes of the constant; changing it needs a data migration that
+# recomputes blocked_span of the existing rows.
+BUFFER_AFTER = timedelta(minutes=10)
+
+
+def fill_blocked_span(apps, schema_editor):
+    # Same span as Reservation.get_blocked_span(): local wall-clock times of
+    # the reservation day, the end widened by BUFFER_AFTER. Rows ending before
+    # they start (e.g. past midnight) have no valid range and keep a NULL span.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE table_reservation SET blocked_span = tstzrange(
+                (date + from_time) AT TIME ZONE %s,
+                ((date + to_time) AT TIME ZONE %s) + %s,
+                '[)'
+            )
+            WHERE to_time > from_time
+            """,
+            [settings.TIME_ZONE, settings.TIME_ZONE, BUFFER_AFTER],
+        )
+        cursor.execute("SELECT id FROM table_reservation WHERE to_time <= from_time ORDER BY id")
+        inverted = [row[0] for row in cursor.fetchall()]
+    if inverted:
+        print(
+            f"\n  Reservations ending before they start, not guarded against overlaps: "
+            f"{', '.join(map(str, inverted))}"
+        )
+
+
+def check_no_overlaps(apps, schema_editor):
+    # Fail with the offending rows instead of a bare constraint error
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT a.id, b.id FROM table_reservation a
+            JOIN table_reservation b
+              ON a.table_id = b.table_id AND a.id < b.id AND a.blocked_span && b.blocked_span
+            WHERE a.status <> 'canceled' AND b.status <> 'canceled'
+            ORDER BY a.id, b.id
+            """
+        )
+        overlaps = cursor.fetchall()
+    if overlaps:
+        pairs = ", ".join(f"{a}/{b}" for a, b in overlaps)
+        raise RuntimeError(
+            f"Overlapping reservations on the same table: {pairs}. "
+            "Cancel or move one of each pair before migrating."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0004_customer_has_completed_verified_order_and_more'),
+        ('table', '0008_reservation_reservation_customer_open_idx'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='reservation',
+            name='blocked_span',
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_blocked_span, migrations.RunPython.noop),
+        migrations.RunPython(check_no_overlaps, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['canceled']), _negated=True), expressions=[('table', '='), ('blocked_span', '&&')], name='reservation_table_no_overlap', violation_error_message='This table is already reserved during the selected time slot. Please choose a different time.'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:00
+
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0004_customer_has_completed_verified_order_and_more'),
+        ('table', '0009_reservation_blocked_span'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, help_text='When the reminder email was queued', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(django.contrib.postgres.fields.ranges.RangeStartsWith('blocked_span'), condition=models.Q(('reminder_sent_at__isnull', True), ('status', 'reserved')), name='reservation_reminder_due_idx'),
+        ),
+    ]
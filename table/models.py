@@ -1,6 +1,11 @@
 from django.db import models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.fields.ranges import RangeStartsWith
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
 from restaurants.models import Restaurant
-from .constants import STATUS_CHOICES , RESERVATION_STATUS_CHOICES,RESERVATION_STATUS
+from .constants import STATUS_CHOICES , RESERVATION_STATUS_CHOICES,RESERVATION_STATUS, BUFFER_AFTER, BLOCKING_EXCLUDED_STATUSES, OVERLAP_CONSTRAINT
 from datetime import datetime, timedelta
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -38,9 +43,64 @@ class Reservation(models.Model):
     verified = models.BooleanField(default=True,null=True, blank=True)
     comment = models.TextField(null=True,blank=True,help_text="Additional notes or special instructions for the reservation")
     
+    # [start, end + BUFFER_AFTER), kept in sync by save()
+    blocked_span = DateTimeRangeField(null=True, blank=True, editable=False)
+    reminder_sent_at = models.DateTimeField(null=True, blank=True, help_text="When the reminder email was queued")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    SPAN_FIELDS = ('date', 'from_time', 'to_time')
+
+    class Meta:
+        constraints = [
+            # No two holding reservations of a table may share any moment of
+            # their blocked spans; checked atomically by a GiST index.
+            ExclusionConstraint(
+                name=OVERLAP_CONSTRAINT,
+                expressions=[
+                    ('table', RangeOperators.EQUAL),
+                    ('blocked_span', RangeOperators.OVERLAPS),
+                ],
+                condition=~models.Q(status__in=BLOCKING_EXCLUDED_STATUSES),
+                violation_error_message="This table is already reserved during the selected time slot. Please choose a different time.",
+            ),
+        ]
+        indexes = [
+            # Backs customer.signals.refresh_open_reservation_count
+            models.Index(
+                fields=['customer'],
+                condition=~models.Q(status='finished'),
+                name='reservation_customer_open_idx',
+            ),
+            # Backs table.reminders.due_reminders: reservations still to be
+            # reminded, by start time
+            models.Index(
+                RangeStartsWith('blocked_span'),
+                condition=models.Q(status='reserved', reminder_sent_at__isnull=True),
+                name='reservation_reminder_due_idx',
+            ),
+        ]
+
+    def get_blocked_span(self):
+        # Inverted times are rejected by ReservationSerializer, legacy rows keep no span
+        if not (self.date and self.from_time and self.to_time) or self.to_time <= self.from_time:
+            return None
+        start = timezone.make_aware(datetime.combine(self.date, self.from_time))
+        end = timezone.make_aware(datetime.combine(self.date, self.to_time))
+        return DateTimeTZRange(start, end + BUFFER_AFTER)
+
+    def save(self, *args, **kwargs):
+        blocked_span = self.get_blocked_span()
+        if self.reminder_sent_at and blocked_span != self.blocked_span:
+            # Rescheduled, remind again for the new time
+            self.reminder_sent_at = None
+        self.blocked_span = blocked_span
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.SPAN_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'blocked_span', 'reminder_sent_at'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         customer_name = self.customer.customer_name if self.customer else "Unknown Customer"
         return f"Reservation for {customer_name} on {self.date} from {self.from_time} to {self.to_time}"
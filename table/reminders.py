@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from notifications.outbox import enqueue_emails
+from .constants import REMINDER_LEAD
+from .models import Reservation
+
+
+REMINDER_BATCH_SIZE = 200
+
+
+
+
+def due_reminders(moment):
+    """
+    Reserved, not yet reminded reservations of customers with an email,
+    starting within REMINDER_LEAD of `moment`. A range scan of
+    reservation_reminder_due_idx.
+    """
+    return Reservation.objects.filter(
+        status='reserved',
+        reminder_sent_at__isnull=True,
+        customer__email__gt='',
+        blocked_span__startswith__gt=moment,
+        blocked_span__startswith__lte=moment + REMINDER_LEAD,
+        # Booked at the last minute: no reminder, as before
+        created_at__lte=F('blocked_span__startswith') - REMINDER_LEAD,
+    )
+
+
+def reminder_email(reservation):
+    start = timezone.localtime(reservation.blocked_span.lower)
+    subject = "Reservierungserinnerung"
+    message = f"""
+                Hallo {reservation.customer.customer_name},
+
+                dies ist eine Erinnerung an Ihre Reservierung bei {reservation.table.restaurant.resturent_name},
+                die für den {start.strftime('%Y-%m-%d %I:%M %p')} geplant ist.
+                Wir freuen uns auf Ihren Besuch!
+            """
+    return subject, message, [reservation.customer.email]
+
+
+def send_due_reminders(moment=None):
+    """
+    Queue the reminder emails of all due reservations into the outbox, in
+    batches. Each batch is stamped with reminder_sent_at in the transaction
+    that queues its emails, so a reservation is reminded at most once even
+    with overlapping sweeps. Returns the number of reminded reservations.
+    """
+    moment = moment or timezone.now()
+    reminded = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                due_reminders(moment)
+                .select_related('customer', 'table__restaurant')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('id')[:REMINDER_BATCH_SIZE]
+            )
+            enqueue_emails([reminder_email(reservation) for reservation in batch])
+            for reservation in batch:
+                reservation.reminder_sent_at = moment
+            Reservation.objects.bulk_update(batch, ['reminder_sent_at'])
+        reminded += len(batch)
+        if len(batch) < REMINDER_BATCH_SIZE:
+            return reminded
@@ -49,6 +49,16 @@ class ReservationSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at','customer']
 
 
+    def validate(self, attrs):
+        # Partial updates are checked against the stored times
+        from_time = attrs.get('from_time', getattr(self.instance, 'from_time', None))
+        to_time = attrs.get('to_time', getattr(self.instance, 'to_time', None))
+        if from_time and to_time and to_time <= from_time:
+            raise serializers.ValidationError(
+                {"to_time": "The reservation must end after it starts, on the same day."}
+            )
+        return attrs
+
     def update(self, instance, validated_data):
         customer_data = validated_data.pop('customer', {})
         
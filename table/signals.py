@@ -1,10 +1,11 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
-from django.conf import settings
+from notifications.outbox import enqueue_email
 from django.utils.html import format_html
-from .models import Reservation
-from datetime import datetime
+from .models import Table, Reservation
+from .availability import invalidate_table_availability
+from restaurants.models import OpenAndCloseTime
 from twilio.rest import Client
 from AIvapi.models import Assistance
 from twilio.base.exceptions import TwilioRestException
@@ -146,10 +147,9 @@ def send_reservation_verified_email(reservation):
     </html>
     """)
 
-    send_mail(
+    enqueue_email(
         subject,
         message,
-        settings.DEFAULT_FROM_EMAIL,
         [customer_email],
         html_message=message
     )
@@ -283,10 +283,9 @@ def send_reservation_confirmation_email_manual(reservation):
         restaurant_address=restaurant.address,
     )
 
-    send_mail(
+    enqueue_email(
         subject,
         message,
-        settings.DEFAULT_FROM_EMAIL,
         [customer_email],
         html_message=message
     )
@@ -443,9 +442,6 @@ def send_reservation_confirmation_email(sender, instance, created, **kwargs):
 
 
 
-from datetime import datetime, timedelta
-from django.utils import timezone
-from .tasks import send_reservation_reminder_email, send_reservation_reminder_sms
 
 
 # @receiver(post_save, sender=Reservation)
@@ -485,39 +481,36 @@ from .tasks import send_reservation_reminder_email, send_reservation_reminder_sm
 #                 # )
 
 
-@receiver(post_save, sender=Reservation)
-def schedule_reservation_reminder(sender, instance, created, **kwargs):
-    """Schedule reminder 30 minutes before reservation starts"""
-    if created and instance.customer:
-        reservation_datetime = datetime.combine(instance.date, instance.from_time)
-        reservation_datetime = timezone.make_aware(reservation_datetime, timezone.get_current_timezone())
-
-        reminder_time = reservation_datetime - timedelta(minutes=30)
-
-        if reminder_time > timezone.now():
-            subject = "Reservierungserinnerung"
-            message = f"""
-                Hallo {instance.customer.customer_name},
-
-                dies ist eine Erinnerung an Ihre Reservierung bei {instance.table.restaurant.resturent_name},
-                die für den {reservation_datetime.strftime('%Y-%m-%d %I:%M %p')} geplant ist.
-                Wir freuen uns auf Ihren Besuch!
-            """
-
-            if instance.customer.email:
-                send_reservation_reminder_email.apply_async(
-                    args=[instance.customer.email, subject, message],
-                    eta=reminder_time
-                )
-
-            # if instance.customer.phone:
-            #     sms_text = (
-            #         f"Erinnerung: Hallo {instance.customer_name}, Ihre Reservierung bei "
-            #         f"{instance.table.restaurant.resturent_name} beginnt heute um "
-            #         f"{reservation_datetime.strftime('%I:%M %p')}."
-            #     )
-            #     send_reservation_reminder_sms.apply_async(
-            #         args=[instance.table.restaurant.id, sms_text, instance.phone_number],
-            #         eta=reminder_time
-                # )
+# Reminders are sent by the table.tasks.send_reservation_reminders beat sweep
+# (see table.reminders) instead of one ETA task per reservation.
+
+
 
+
+# --- Availability index (see table.availability) ---
+
+def invalidate_availability_on_commit(restaurant_ids):
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id}
+    if not restaurant_ids:
+        return
+
+    def invalidate():
+        for restaurant_id in restaurant_ids:
+            invalidate_table_availability(restaurant_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def reservation_availability_changed(sender, instance, **kwargs):
+    restaurant_ids = Table.objects.filter(id=instance.table_id).values_list("restaurant_id", flat=True)
+    invalidate_availability_on_commit(restaurant_ids)
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+@receiver(post_save, sender=OpenAndCloseTime)
+@receiver(post_delete, sender=OpenAndCloseTime)
+def tables_or_hours_changed(sender, instance, **kwargs):
+    invalidate_availability_on_commit([instance.restaurant_id])
@@ -0,0 +1,73 @@
+from datetime import datetime, time
+from django.utils import timezone
+from accounts.snapshot import invalidate_restaurant_full_data
+from .constants import BUFFER_BEFORE, BUFFER_AFTER
+from .models import Table, Reservation
+
+
+# Reservations that put their table on hold
+HOLDING_STATUSES = ['reserved', 'walk-in']
+
+# A reservation spanning these times holds its table for the whole day
+FULL_DAY = (time(0, 0), time(23, 59, 59))
+
+
+
+
+def reserved_table_ids(tables, date, moment=None):
+    """
+    Ids of the tables held at `moment` (default now) by a reservation on `date`:
+    from BUFFER_BEFORE ahead of its start until BUFFER_AFTER past its end,
+    or all day long for a full-day reservation. One query for all tables.
+    """
+    moment = timezone.localtime(moment)
+    reservations = Reservation.objects.filter(date=date, status__in=HOLDING_STATUSES)
+    if tables is not None:
+        reservations = reservations.filter(table__in=tables)
+
+    reserved = set()
+    for table_id, from_time, to_time in reservations.values_list("table_id", "from_time", "to_time"):
+        if table_id in reserved:
+            continue
+        if (from_time, to_time) == FULL_DAY:
+            reserved.add(table_id)
+            continue
+        start = timezone.make_aware(datetime.combine(date, from_time))
+        end = timezone.make_aware(datetime.combine(date, to_time))
+        if start - BUFFER_BEFORE <= moment <= end + BUFFER_AFTER:
+            reserved.add(table_id)
+    return reserved
+
+
+def annotate_reservation_status(tables, date, moment=None):
+    """
+    Set reservation_status of the given (evaluated) tables for `date` without
+    saving them, for read-only views.
+    """
+    reserved = reserved_table_ids([table.id for table in tables], date, moment)
+    for table in tables:
+        table.reservation_status = 'reserved' if table.id in reserved else 'available'
+    return tables
+
+
+def refresh_table_statuses(moment=None):
+    """
+    Persist the current reservation_status of every table. Only tables whose
+    status changed are written, in one bulk_update. Returns their number.
+    """
+    moment = timezone.localtime(moment)
+    reserved = reserved_table_ids(None, moment.date(), moment)
+
+    changed = []
+    for table in Table.objects.only("id", "restaurant_id", "reservation_status"):
+        new_status = 'reserved' if table.id in reserved else 'available'
+        if table.reservation_status != new_status:
+            table.reservation_status = new_status
+            table.updated_at = moment
+            changed.append(table)
+
+    Table.objects.bulk_update(changed, ["reservation_status", "updated_at"], batch_size=500)
+    # bulk_update sends no post_save, the call-context snapshots hold the status too
+    for restaurant_id in {table.restaurant_id for table in changed}:
+        invalidate_restaurant_full_data(restaurant_id)
+    return len(changed)
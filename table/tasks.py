@@ -1,21 +1,17 @@
 from celery import shared_task
-from django.core.mail import send_mail
-from django.conf import settings
 from twilio.rest import Client
 from AIvapi.models import Assistance
+from .status import refresh_table_statuses
+from .reminders import send_due_reminders
 
 
 @shared_task
 def send_reservation_reminder_email(email, subject, message):
-    """Send reminder email"""
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [email],
-        html_message=message
-    )
-    return f"Reminder email sent to {email}"
+    """
+    Retired: reminders are queued by send_reservation_reminders. Kept so ETA
+    tasks scheduled before the sweep are consumed without a duplicate email.
+    """
+    return f"Skipped reminder email to {email}, sent by the reminder sweep"
 
 
 @shared_task
@@ -41,3 +37,15 @@ def send_reservation_reminder_sms(restaurant_id, body, to_phone):
         return msg.sid
     except Exception as e:
         return str(e)
+
+
+@shared_task
+def refresh_table_reservation_statuses():
+    """Bring every table's reservation_status up to date, run by beat every minute"""
+    return refresh_table_statuses()
+
+
+@shared_task
+def send_reservation_reminders():
+    """Queue the reminder emails of reservations starting soon, run by beat every minute"""
+    return f"Reminded {send_due_reminders()} reservations"
@@ -1,3 +1,188 @@
-from django.test import TestCase
+import io
+from contextlib import redirect_stdout
+from datetime import date, time
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from customer.models import Customer
+from restaurants.models import Restaurant, OpenAndCloseTime
+from .availability import is_overlap_violation
+from .models import Table, Reservation
+from .views import TABLE_TAKEN_ERROR
 
 # Create your tests here.
+
+
+
+
+class ReservationReadQueriesTests(TestCase):
+    """The owner's per-day reservation views run a fixed number of queries."""
+
+    DAY = date(2030, 1, 2)
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create(username="owner", email="owner@example.com")
+        self.restaurant = Restaurant.objects.create(resturent_name="Test", address="Street 1", owner=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def add_tables(self, tables, reservations_per_table):
+        first = Table.objects.filter(restaurant=self.restaurant).count()
+        for table_no in range(first, first + tables):
+            table = Table.objects.create(restaurant=self.restaurant, table_name=f"T{table_no}", total_set=4)
+            for hour in range(12, 12 + 2 * reservations_per_table, 2):
+                customer = Customer.objects.create(customer_name=f"C{table_no}-{hour}", phone=f"+49{table_no}{hour}")
+                Reservation.objects.create(
+                    table=table, customer=customer, guest_no=2, date=self.DAY,
+                    from_time=time(hour), to_time=time(hour + 1),
+                    status='walk-in' if hour == 12 else 'reserved',
+                )
+
+    def test_table_timeline_query_count_is_constant(self):
+        # restaurant, tables, reservations with their customers
+        for tables, reservations_per_table in [(1, 1), (5, 4)]:
+            self.add_tables(tables, reservations_per_table)
+            with self.assertNumQueries(3):
+                response = self.client.get("/owner/table-reservations/", {"date": self.DAY.isoformat()})
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(response.data), 6)
+        timeline = next(table for table in response.data if table["table_name"] == "T5")["reservations"]
+        self.assertEqual(
+            [reservation["from_time"] for reservation in timeline],
+            ["12:00:00", "14:00:00", "16:00:00", "18:00:00"],
+        )
+        self.assertEqual(timeline[0]["customer_name"], "C5-12")
+
+    def test_reservation_stats_single_aggregate(self):
+        self.add_tables(3, 2)
+        # restaurant, aggregate
+        with self.assertNumQueries(2):
+            response = self.client.get("/owner/reservation-stats/", {"date": self.DAY.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"total_guests": 12, "total_reservations": 6, "total_walk_in": 3})
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/owner/reservation-stats/", {"date": "2030-01-03"})
+        self.assertEqual(response.status_code, 404)
+
+
+
+
+class ReservationOverlapConstraintTests(TestCase):
+    """The exclusion constraint keeps holding reservations of a table apart, BUFFER_AFTER included."""
+
+    DAY = date(2030, 1, 2)
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create(username="owner", email="owner@example.com")
+        self.restaurant = Restaurant.objects.create(resturent_name="Test", address="Street 1", owner=self.owner)
+        self.table = Table.objects.create(restaurant=self.restaurant, table_name="T1", total_set=4)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def reserve(self, from_time, to_time, status='reserved'):
+        return Reservation.objects.create(
+            table=self.table, guest_no=2, date=self.DAY, from_time=from_time, to_time=to_time, status=status,
+        )
+
+    def test_overlapping_holding_reservations_are_rejected(self):
+        self.reserve(time(18), time(19))
+        # Starts inside the 10 minutes kept free after the first one
+        with self.assertRaises(IntegrityError) as raised, transaction.atomic():
+            self.reserve(time(19, 5), time(20), status='walk-in')
+        self.assertTrue(is_overlap_violation(raised.exception))
+
+    def test_canceled_reservation_does_not_hold_the_slot(self):
+        self.reserve(time(18), time(19), status='canceled')
+        self.reserve(time(18), time(19))
+        self.reserve(time(19, 10), time(20))
+        self.assertEqual(Reservation.objects.filter(table=self.table).count(), 3)
+
+    def test_update_onto_a_taken_slot_is_a_400(self):
+        self.reserve(time(18), time(19))
+        moved = self.reserve(time(20), time(21))
+
+        response = self.client.patch(
+            f"/owner/reservations/update/{moved.id}/",
+            {"from_time": "18:30:00", "to_time": "19:30:00"},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": TABLE_TAKEN_ERROR})
+        moved.refresh_from_db()
+        self.assertEqual(moved.from_time, time(20))
+
+    def test_create_losing_the_race_is_a_400(self):
+        OpenAndCloseTime.objects.create(
+            restaurant=self.restaurant, day_of_week=self.DAY.strftime("%A").lower(),
+            opening_time=time(9), closing_time=time(23),
+        )
+        self.reserve(time(18), time(19))
+
+        # The availability index was read before the other booking committed
+        with mock.patch("table.views.get_day_availability") as availability:
+            availability.return_value.is_free.return_value = True
+            response = self.client.post("/owner/reservations/create/", {
+                "table": self.table.id, "customer_name": "Guest", "phone_number": "+4911", "guest_no": 2,
+                "date": self.DAY.isoformat(), "from_time": "18:30:00", "to_time": "19:30:00",
+            })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, [TABLE_TAKEN_ERROR])
+        self.assertEqual(Reservation.objects.filter(table=self.table).count(), 1)
+
+
+
+
+class BlockedSpanMigrationTests(TransactionTestCase):
+    """Migration 0009 fills blocked_span and refuses to add the constraint over existing overlaps."""
+
+    migrate_from = [("table", "0008_reservation_reservation_customer_open_idx")]
+    migrate_to = [("table", "0009_reservation_blocked_span")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        with redirect_stdout(io.StringIO()) as output:
+            executor.migrate(targets)
+        return executor.loader.project_state(targets).apps, output.getvalue()
+
+    def setUp(self):
+        apps, _ = self.migrate(self.migrate_from)
+        # Only the table app is rolled back, the other tables keep their current schema
+        owner = get_user_model().objects.create(username="owner", email="owner@example.com")
+        restaurant = Restaurant.objects.create(resturent_name="Test", address="Street 1", owner=owner)
+        table = apps.get_model("table", "Table").objects.create(restaurant_id=restaurant.id, table_name="T1", total_set=4)
+
+        reservation = apps.get_model("table", "Reservation")
+        self.ids = {}
+        for name, status, from_time, to_time in [
+            ("first", "reserved", time(18), time(19)),
+            ("overlapping", "reserved", time(19, 5), time(20)),
+            ("canceled", "canceled", time(18), time(19)),
+            ("inverted", "reserved", time(23), time(1)),
+        ]:
+            self.ids[name] = reservation.objects.create(
+                table_id=table.id, guest_no=2, date=date(2030, 1, 2), from_time=from_time, to_time=to_time, status=status,
+            ).id
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_overlaps_stop_the_migration_then_spans_are_filled(self):
+        with self.assertRaisesMessage(RuntimeError, f"{self.ids['first']}/{self.ids['overlapping']}"):
+            self.migrate(self.migrate_to)
+
+        apps, _ = self.migrate(self.migrate_from)
+        apps.get_model("table", "Reservation").objects.filter(id=self.ids["overlapping"]).update(status="canceled")
+        apps, output = self.migrate(self.migrate_to)
+
+        spans = dict(apps.get_model("table", "Reservation").objects.values_list("id", "blocked_span"))
+        self.assertEqual(spans[self.ids["first"]], Reservation(
+            date=date(2030, 1, 2), from_time=time(18), to_time=time(19),
+        ).get_blocked_span())
+        self.assertIsNone(spans[self.ids["inverted"]])
+        self.assertIn(str(self.ids["inverted"]), output)
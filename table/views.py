@@ -17,22 +17,26 @@ from django.utils.timezone import now
 from customer.models import Customer
 # Create your views here.
 from django.utils import timezone
-from pytz import timezone as pytz_timezone
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils.html import format_html
-from django.db.models import Sum
+from django.db.models import Count, Prefetch, Sum
 from rest_framework.permissions import AllowAny
 from rest_framework.parsers import JSONParser
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from Channel.events import publish
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
 from django.utils.timezone import localtime
 from .signals import send_reservation_confirmation_email_manual
+from accounts.async_views import AsyncAPIView, api_response, run_in_thread_pool
+from django.db import IntegrityError, transaction
+from .availability import DEFAULT_DURATION, MAX_SLOTS, aget_day_availability, get_day_availability, is_overlap_violation
+from .status import annotate_reservation_status
 
 
 
+TABLE_TAKEN_ERROR = "This table is already reserved during the selected time slot. Please choose a different time."
+
 
 
 class TableCreateView(APIView):
@@ -139,52 +143,9 @@ class TableListView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        restaurant_timezone = pytz_timezone('Europe/Berlin')
-        tables = Table.objects.filter(restaurant=restaurant)
-        current_time = timezone.now().astimezone(restaurant_timezone)
-
-
-
-        
-        for table in tables:
-            has_reservation = Reservation.objects.filter(
-                table=table,
-                date=today,
-                status__in=['reserved', 'walk-in']
-            ).exists()
-
-            is_reserved = False
-            if has_reservation:
-                reservations = Reservation.objects.filter(
-                    table=table,
-                    date=today,
-                    status__in=['reserved', 'walk-in']
-                )
-                for reservation in reservations:
-                    from_datetime = timezone.make_aware(
-                        datetime.combine(today, reservation.from_time), 
-                        timezone=restaurant_timezone
-                    )
-                    to_datetime = timezone.make_aware(
-                        datetime.combine(today, reservation.to_time), 
-                        timezone=restaurant_timezone
-                    )
-
-                    if from_datetime.time() == datetime.strptime('00:00:00', "%H:%M:%S").time() and to_datetime.time() == datetime.strptime('23:59:59', "%H:%M:%S").time():
-                        is_reserved = True
-                        break
-
-                    time_before_1_hour = from_datetime - timedelta(hours=1)
-                    time_after_10_min = to_datetime + timedelta(minutes=10)
-
-                    if time_before_1_hour <= current_time <= time_after_10_min:
-                        is_reserved = True
-                        break 
-            new_status = 'reserved' if is_reserved else 'available'
-            if table.reservation_status != new_status:
-                table.reservation_status = new_status
-                table.save()
-                print(f"Table {table.table_name} status updated to '{new_status}'.")
+        # Read only: derived for the requested date, the stored column is
+        # refreshed by the table.tasks.refresh_table_reservation_statuses beat job
+        tables = annotate_reservation_status(list(Table.objects.filter(restaurant=restaurant)), today)
 
         serializer = TableSerializer(tables, many=True)
         data = serializer.data
@@ -391,6 +352,8 @@ class ReservationCreateAPIView(APIView):
 
         from_time = datetime.strptime(f"{date} {from_time}", '%Y-%m-%d %H:%M:%S')
         to_time = datetime.strptime(f"{date} {to_time}", '%Y-%m-%d %H:%M:%S')
+        if to_time <= from_time:
+            raise ValidationError("The reservation must end after it starts, on the same day.")
 
         # CHECK RESTAURANT OPEN & CLOSE TIME
         day_name = date.strftime("%A").lower()
@@ -423,19 +386,9 @@ class ReservationCreateAPIView(APIView):
 
 
 
-        conflicting_reservations = Reservation.objects.filter(
-            table=table,
-            date=date
-        )
-
-        for reservation in conflicting_reservations:
-            # Convert reservation times to datetime objects using the same date
-            reservation_from_time = datetime.combine(date, reservation.from_time)
-            reservation_to_time = datetime.combine(date, reservation.to_time)
-
-            # Check for conflicts (1 hour before and 10 minutes after)
-            if (from_time < reservation_to_time + timedelta(minutes=10)) and (to_time > reservation_from_time - timedelta(minutes=60)):
-                raise ValidationError(f"This table is already reserved during the selected time slot. Please choose a different time.")
+        availability = get_day_availability(restaurant.id, date)
+        if not availability.is_free(table.id, from_time, to_time):
+            raise ValidationError(TABLE_TAKEN_ERROR)
             
         
 
@@ -460,22 +413,17 @@ class ReservationCreateAPIView(APIView):
         serializer = ReservationSerializer(data=serializer_data)
 
         if serializer.is_valid():
-            verified_status = True
-            if phone_number:
-                has_unfinished = Reservation.objects.filter(
-                    customer__phone=phone_number
-                ).exclude(status='finished').exists()
-                if has_unfinished:
-                    verified_status = False
-            reservation = serializer.save(verified=verified_status,customer=customer)
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant.id}",
-                {
-                    "type": "reservation_created",
-                    "reservation": ReservationSerializer(reservation).data
-                }
-            )    
+            # Customers with an unfinished reservation have to verify the new one
+            verified_status = not (phone_number and customer.open_reservation_count)
+            try:
+                with transaction.atomic():
+                    reservation = serializer.save(verified=verified_status,customer=customer)
+            except IntegrityError as e:
+                # Lost the race against a concurrent booking of the slot
+                if is_overlap_violation(e):
+                    raise ValidationError(TABLE_TAKEN_ERROR)
+                raise
+            publish(restaurant.id, "reservation_created", "reservation", ReservationSerializer(reservation).data)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -564,7 +512,7 @@ class TableReservationStatusUpdateView(APIView):
         'date', openapi.IN_QUERY, description="Date to filter reservations. Format: YYYY-MM-DD", type=openapi.TYPE_STRING
     )
     @swagger_auto_schema(
-        operation_description="Fetch and update reservation status for all tables for the logged-in user's restaurant based on reservations for the specified or current date.",
+        operation_description="Fetch the reservation status of all tables of the logged-in user's restaurant based on reservations for the specified or current date.",
         manual_parameters=[table_status_param],
         responses={
             200: TableSerializer(many=True),
@@ -595,49 +543,9 @@ class TableReservationStatusUpdateView(APIView):
                 {"error": "You don't have a restaurant assigned."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        restaurant_timezone = pytz_timezone('Europe/Berlin')
-        tables = Table.objects.filter(restaurant=restaurant)
-        current_time = timezone.now().astimezone(restaurant_timezone)
-
-        for table in tables:
-            has_reservation = Reservation.objects.filter(
-                table=table,
-                date=today,
-                status__in=['reserved', 'walk-in']
-            ).exists()
-
-            is_reserved = False
-            if has_reservation:
-                reservations = Reservation.objects.filter(
-                    table=table,
-                    date=today,
-                    status__in=['reserved', 'walk-in']
-                )
-                for reservation in reservations:
-                    from_datetime = timezone.make_aware(
-                        datetime.combine(today, reservation.from_time), 
-                        timezone=restaurant_timezone
-                    )
-                    to_datetime = timezone.make_aware(
-                        datetime.combine(today, reservation.to_time), 
-                        timezone=restaurant_timezone
-                    )
-
-                    if from_datetime.time() == datetime.strptime('00:00:00', "%H:%M:%S").time() and to_datetime.time() == datetime.strptime('23:59:59', "%H:%M:%S").time():
-                        is_reserved = True
-                        break
-
-                    time_before_1_hour = from_datetime - timedelta(hours=1)
-                    time_after_10_min = to_datetime + timedelta(minutes=10)
-
-                    if time_before_1_hour <= current_time <= time_after_10_min:
-                        is_reserved = True
-                        break 
-            new_status = 'reserved' if is_reserved else 'available'
-            if table.reservation_status != new_status:
-                table.reservation_status = new_status
-                table.save()
-                print(f"Table {table.table_name} status updated to '{new_status}'.")
+        # Read only: derived for the requested date, the stored column is
+        # refreshed by the table.tasks.refresh_table_reservation_statuses beat job
+        tables = annotate_reservation_status(list(Table.objects.filter(restaurant=restaurant)), today)
 
         serializer = TableSerializer(tables, many=True)
         return Response(serializer.data)
@@ -723,15 +631,14 @@ class ReservationUpdateAPIView(APIView):
 
         serializer = ReservationSerializer(reservation, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant.id}",
-                {
-                    "type": "reservation_updated",
-                    "reservation": serializer.data
-                }
-            )
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError as e:
+                if is_overlap_violation(e):
+                    return Response({"error": TABLE_TAKEN_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+                raise
+            publish(restaurant.id, "reservation_updated", "reservation", serializer.data)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -803,31 +710,27 @@ class ReservationStatsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        reservations = Reservation.objects.filter(
+        # Guests, reservations and walk-ins of the day in one query
+        totals = Reservation.objects.filter(
             table__restaurant=restaurant, 
             date=date
+        ).aggregate(
+            total_guests=Sum('guest_no'),
+            total_reservations=Count('id'),
+            total_walk_in=Count('id', filter=Q(status='walk-in')),
         )
         
-        if not reservations.exists():
+        if not totals['total_reservations']:
             return Response(
                 {"error": "No reservations found for this date."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Calculate total number of guests (sum of guest_no)
-        total_guests = reservations.aggregate(Sum('guest_no'))['guest_no__sum'] or 0
-
-        # Count total reservations
-        total_reservations = reservations.count()
-
-        # Count walk-in customers (reservations with status 'walk-in')
-        total_walk_in = reservations.filter(status='walk-in').count()
-
         # Prepare the response data
         data = {
-            "total_guests": total_guests,
-            "total_reservations": total_reservations,
-            "total_walk_in": total_walk_in,
+            "total_guests": totals['total_guests'] or 0,
+            "total_reservations": totals['total_reservations'],
+            "total_walk_in": totals['total_walk_in'],
         }
 
         return Response(data, status=status.HTTP_200_OK)
@@ -905,13 +808,19 @@ class TableReservationsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get all tables for the restaurant, and fetch reservations for the given date
-        tables = Table.objects.filter(restaurant=restaurant)
+        # Get all tables for the restaurant with their reservations for the given
+        # date (and the reservation customers) prefetched: three queries in total
+        tables = Table.objects.filter(restaurant=restaurant).prefetch_related(
+            Prefetch(
+                'reservations',
+                queryset=Reservation.objects.filter(date=date).select_related('customer').order_by('from_time', 'id'),
+                to_attr='day_reservations',
+            )
+        )
         tables_with_reservations = []
 
         for table in tables:
-            # Get reservations for the table on the given date
-            reservations = Reservation.objects.filter(table=table, date=date)
+            reservations = table.day_reservations
             reservations_data = [
                 {
                     "customer_name": reservation.customer.customer_name if reservation.customer else "Unknown",
@@ -940,9 +849,10 @@ class TableReservationsView(APIView):
 
 
 
-class PublicReservationCreateAPIView(APIView):
-    permission_classes = [AllowAny]
-    # parser_classes = [MultiPartParser, FormParser]
+class PublicReservationCreateAPIView(AsyncAPIView):
+    """
+    Public webhook to create a reservation (native async view).
+    """
     parser_classes = [JSONParser]
 
     @swagger_auto_schema(
@@ -950,8 +860,8 @@ class PublicReservationCreateAPIView(APIView):
         request_body=ReservationSerializer,
         responses={status.HTTP_201_CREATED: ReservationSerializer},
         tags=['Webhook'],
-    )  
-    def post(self, request, *args, **kwargs):
+    )
+    async def post(self, request, *args, **kwargs):
         data = request.data
 
 
@@ -964,8 +874,8 @@ class PublicReservationCreateAPIView(APIView):
         if not table_id:
             raise ValidationError("Table is required.")
         try:
-            table = Table.objects.get(id=table_id)
-        except Table.DoesNotExist:
+            table = await Table.objects.select_related('restaurant').aget(id=table_id)
+        except (Table.DoesNotExist, ValueError):
             raise ValidationError("Invalid table ID provided.")
         
         guest_no = int(data.get("guest_no", 0))
@@ -985,6 +895,8 @@ class PublicReservationCreateAPIView(APIView):
 
         from_time = datetime.strptime(f"{date} {from_time}", '%Y-%m-%d %H:%M:%S')
         to_time = datetime.strptime(f"{date} {to_time}", '%Y-%m-%d %H:%M:%S')
+        if to_time <= from_time:
+            raise ValidationError("The reservation must end after it starts, on the same day.")
 
 
          # ----------------------------------------------------
@@ -993,7 +905,7 @@ class PublicReservationCreateAPIView(APIView):
         day_name = date.strftime("%A").lower()
 
         try:
-            open_close = OpenAndCloseTime.objects.get(
+            open_close = await OpenAndCloseTime.objects.aget(
                 restaurant=restaurant,
                 day_of_week=day_name
             )
@@ -1009,7 +921,7 @@ class PublicReservationCreateAPIView(APIView):
 
         # Time must be within opening hours
         if from_time < opening_dt or to_time > closing_dt:
-            return Response(
+            return api_response(
                     {
                         "error": (
                             f"Reservation must be within business hours: "
@@ -1021,28 +933,21 @@ class PublicReservationCreateAPIView(APIView):
                 )
 
 
-        conflicting_reservations = Reservation.objects.filter(
-            table=table,
-            date=date
-        )
-
-        for reservation in conflicting_reservations:
-            # Convert reservation times to datetime objects using the same date
-            reservation_from_time = datetime.combine(date, reservation.from_time)
-            reservation_to_time = datetime.combine(date, reservation.to_time)
-
-            # Check for conflicts (1 hour before and 10 minutes after)
-            if (from_time < reservation_to_time + timedelta(minutes=10)) and (to_time > reservation_from_time - timedelta(minutes=60)):
-                raise ValidationError(f"This table is already reserved during the selected time slot. Please choose a different time.")
+        availability = await aget_day_availability(restaurant.id, date)
+        if not availability.is_free(table.id, from_time, to_time):
+            raise ValidationError(TABLE_TAKEN_ERROR)
             
         
 
-        customer, created = Customer.objects.get_or_create(phone=phone_number)
+        customer, created = await Customer.objects.aget_or_create(phone=phone_number)
         
         customer.customer_name = customer_name or customer.customer_name
         customer.email = email or customer.email
         customer.address = address or customer.address
-        customer.save()
+        await customer.asave()
+
+        # Customers with an unfinished reservation have to verify the new one
+        verified_status = not (phone_number and customer.open_reservation_count)
 
         serializer_data = {
             "customer": customer.id, 
@@ -1055,27 +960,28 @@ class PublicReservationCreateAPIView(APIView):
             "status": data.get("status", "reserved"),
         }
 
+        reservation_data, errors = await run_in_thread_pool(self.create_reservation)(serializer_data, verified_status, customer, restaurant)
+        if errors:
+            return api_response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return api_response(reservation_data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def create_reservation(serializer_data, verified_status, customer, restaurant):
         serializer = ReservationSerializer(data=serializer_data)
-        if serializer.is_valid():
-            verified_status = True
-            if phone_number:
-                has_unfinished = Reservation.objects.filter(
-                    customer__phone=phone_number
-                ).exclude(status='finished').exists()
-                if has_unfinished:
-                    verified_status = False
-            reservation = serializer.save(verified=verified_status,customer=customer)
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"restaurant_{restaurant.id}",
-                {
-                    "type": "reservation_created",
-                    "reservation": ReservationSerializer(reservation).data
-                }
-            ) 
-            return Response(ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        # The confirmation email is queued in the same transaction (post_save signal)
+        try:
+            with transaction.atomic():
+                reservation = serializer.save(verified=verified_status,customer=customer)
+                data = ReservationSerializer(reservation).data
+                publish(restaurant.id, "reservation_created", "reservation", data)
+        except IntegrityError as e:
+            # Lost the race against a concurrent booking of the slot
+            if is_overlap_violation(e):
+                raise ValidationError(TABLE_TAKEN_ERROR)
+            raise
+        return data, None
 
 
 
@@ -1205,3 +1111,97 @@ class ReservationAutoVerifyView(APIView):
 
 
 
+
+class PublicTableAvailabilityAPIView(AsyncAPIView):
+    """
+    Public webhook: free tables for a party at a time, and the next free slots
+    (native async view).
+
+    Payload: restaurant, date (YYYY-MM-DD), guest_no, optional from_time /
+    to_time (HH:MM[:SS]), duration_minutes and slots.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Public API: free tables for a party at a given time, and the next free slots of the day.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "restaurant": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "date": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                "guest_no": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "from_time": openapi.Schema(type=openapi.TYPE_STRING, description="Optional, HH:MM[:SS]"),
+                "to_time": openapi.Schema(type=openapi.TYPE_STRING, description="Optional, HH:MM[:SS]"),
+                "duration_minutes": openapi.Schema(type=openapi.TYPE_INTEGER, description="Optional, used when to_time is not given"),
+                "slots": openapi.Schema(type=openapi.TYPE_INTEGER, description=f"Optional, number of free slots to return (max {MAX_SLOTS})"),
+            },
+            required=["restaurant", "date", "guest_no"],
+        ),
+        responses={
+            200: "available_tables (when from_time is given) and next_free_slots",
+            400: "Validation Error",
+            404: "Restaurant not found",
+        },
+        tags=["Webhook"]
+    )
+    async def post(self, request, *args, **kwargs):
+        data = request.data
+
+        restaurant_id = data.get("restaurant")
+        if not restaurant_id:
+            raise ValidationError("Restaurant is required.")
+        try:
+            restaurant_exists = await Restaurant.objects.filter(id=restaurant_id).aexists()
+        except ValueError:
+            restaurant_exists = False
+        if not restaurant_exists:
+            return api_response({"error": "Restaurant not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            date = datetime.strptime(data.get("date") or "", "%Y-%m-%d").date()
+            guest_no = int(data.get("guest_no") or 0)
+            limit = min(int(data.get("slots") or 3), MAX_SLOTS)
+            duration = timedelta(minutes=int(data["duration_minutes"])) if data.get("duration_minutes") else DEFAULT_DURATION
+            from_time = self.parse_time(data.get("from_time"))
+            to_time = self.parse_time(data.get("to_time"))
+        except (TypeError, ValueError):
+            raise ValidationError("Use date YYYY-MM-DD, times HH:MM[:SS] and whole numbers for guest_no, slots and duration_minutes.")
+
+        if guest_no < 1:
+            raise ValidationError("guest_no must be at least 1.")
+        today = timezone.localdate()
+        if date < today:
+            raise ValidationError("The date is in the past.")
+
+        if from_time and to_time:
+            duration = datetime.combine(date, to_time) - datetime.combine(date, from_time)
+        if duration <= timedelta(0):
+            raise ValidationError("to_time must be after from_time.")
+
+        availability = await aget_day_availability(restaurant_id, date)
+
+        response = {"date": date, "guest_no": guest_no, "from_time": from_time, "to_time": None}
+        after = from_time
+        if date == today:
+            current = timezone.localtime().time().replace(microsecond=0)
+            after = max(after, current) if after else current
+
+        if from_time:
+            end = datetime.combine(date, from_time) + duration
+            if end.date() != date:
+                raise ValidationError("The reservation has to end on the same day.")
+            response["to_time"] = end.time()
+            response["available_tables"] = availability.free_tables(guest_no, from_time, end.time())
+
+        response["next_free_slots"] = availability.next_free_slots(guest_no, duration, after=after, limit=limit)
+        return api_response(response, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def parse_time(value):
+        if not value:
+            return None
+        for time_format in ("%H:%M:%S", "%H:%M"):
+            try:
+                return datetime.strptime(value, time_format).time()
+            except ValueError:
+                continue
+        raise ValueError(value)